@@ -1,9 +1,17 @@
-from adapters.dns import DnsPort, build_dns
+from adapters.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitTimeoutError
+from adapters.fake_latency import LatencyConfig
+from adapters.dns import DnsPort, DnsResolverPort, build_dns, build_dns_resolver
 from adapters.email_delivery import EmailDeliveryPort, build_email_delivery
 
 __all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CircuitTimeoutError",
+    "LatencyConfig",
     "DnsPort",
     "build_dns",
+    "DnsResolverPort",
+    "build_dns_resolver",
     "EmailDeliveryPort",
     "build_email_delivery"
 ]
\ No newline at end of file
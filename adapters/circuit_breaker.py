@@ -0,0 +1,161 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+import logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Provider {name} is unavailable, retry after {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitTimeoutError(Exception): ...
+
+
+class CircuitBreakerState(BaseModel):
+    name: str
+    state: str
+    consecutive_failures: int
+    retry_after: float
+
+
+class CircuitBreaker:
+    """
+    Guards calls to an external provider.
+
+    Every call runs with a per-operation timeout. After `failure_threshold` consecutive
+    failures or timeouts the circuit opens and calls fail fast with CircuitOpenError.
+    Once `reset_timeout` seconds have passed a single probe call is let through (half open),
+    its outcome decides whether the circuit closes again or stays open.
+
+    A timed out call may still complete at the provider, callers that must not repeat
+    a side effect should treat CircuitTimeoutError as an unknown outcome.
+    """
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        default_timeout: float = 30,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_concurrency: int = 16
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f"circuit-{name}"
+        )
+
+    def call(self, operation: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        is_probe = self._before_call()
+
+        timeout = self.timeouts.get(operation, self.default_timeout)
+        future = self._executor.submit(fn, *args, **kwargs)
+
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Only stops calls still waiting for a worker, a running call cannot be interrupted
+            future.cancel()
+            self._on_failure(is_probe)
+            raise CircuitTimeoutError(f"{self.name}.{operation} timed out after {timeout}s")
+        except Exception:
+            self._on_failure(is_probe)
+            raise
+
+        self._on_success(is_probe)
+        return result
+
+    def get_state(self) -> CircuitBreakerState:
+        with self._lock:
+            return CircuitBreakerState(
+                name=self.name,
+                state=self.state.value,
+                consecutive_failures=self.consecutive_failures,
+                retry_after=self._retry_after()
+            )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _before_call(self) -> bool:
+        """Raise if the call should fail fast, returns whether the call is the half open probe"""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return False
+
+            if self.state == CircuitState.OPEN:
+                retry_after = self._retry_after()
+                if retry_after > 0:
+                    raise CircuitOpenError(self.name, retry_after)
+
+                self.state = CircuitState.HALF_OPEN
+                logger.info(f"Circuit {self.name} half open, probing provider")
+
+            # Half open, only one probe at a time
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, self.reset_timeout)
+
+            self._probe_in_flight = True
+            return True
+
+    def _on_success(self, is_probe: bool):
+        with self._lock:
+            if is_probe:
+                self._probe_in_flight = False
+                self.state = CircuitState.CLOSED
+                self.opened_at = None
+                logger.info(f"Circuit {self.name} closed")
+            elif self.state != CircuitState.CLOSED:
+                # Started before the circuit opened, only the probe may close it
+                return
+
+            self.consecutive_failures = 0
+
+    def _on_failure(self, is_probe: bool):
+        with self._lock:
+            self.consecutive_failures += 1
+
+            if is_probe:
+                self._probe_in_flight = False
+
+            if is_probe or self.consecutive_failures >= self.failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} consecutive failures")
+                self.state = CircuitState.OPEN
+                self.opened_at = time.monotonic()
+
+    def _retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through. Expects the lock to be held"""
+        if self.state != CircuitState.OPEN or self.opened_at is None:
+            return 0.0
+
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
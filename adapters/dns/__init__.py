@@ -1,7 +1,11 @@
 from adapters.dns.dns import DnsPort
-from adapters.dns.compose import build_dns
+from adapters.dns.dns_resolver import DnsResolverPort, StaticDnsResolverAdapter
+from adapters.dns.compose import build_dns, build_dns_resolver
 
 __all__ = [
     "DnsPort",
-    "build_dns"
-]
\ No newline at end of file
+    "DnsResolverPort",
+    "StaticDnsResolverAdapter",
+    "build_dns",
+    "build_dns_resolver"
+]
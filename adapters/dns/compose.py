@@ -1,12 +1,48 @@
 from .dns import DnsPort
 from .dns_porkbun import PorkbunDnsAdapter
+from .dns_fake import FakeDnsAdapter
+from .dns_circuit_breaker import CircuitBreakerDnsAdapter
+from .dns_resolver import DnsResolverPort, StaticDnsResolverAdapter
+from .dns_resolver_doh import DohDnsResolverAdapter
+from adapters.circuit_breaker import CircuitBreaker
+from adapters.fake_latency import LatencyConfig
 
-from typing import Literal
+from typing import Literal, Optional
 
-DNS_OPTIONS = Literal["PORKBUN"]
+DNS_OPTIONS = Literal["PORKBUN", "FAKE"]
+DNS_RESOLVER_OPTIONS = Literal["DOH", "STATIC", "NONE"]
 
-def build_dns(dns_type: DNS_OPTIONS) -> DnsPort:
+def build_dns(
+    dns_type: DNS_OPTIONS,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    fake_latency: Optional[LatencyConfig] = None
+) -> DnsPort:
     if dns_type == "PORKBUN":
-        return PorkbunDnsAdapter()
+        dns = PorkbunDnsAdapter()
+    elif dns_type == "FAKE":
+        dns = FakeDnsAdapter(latency=fake_latency)
     else:
         raise ValueError(f"Invalid DNS type: {dns_type}")
+    
+    if circuit_breaker is not None:
+        return CircuitBreakerDnsAdapter(dns, circuit_breaker)
+    
+    return dns
+
+
+def build_dns_resolver(
+    resolver_type: DNS_RESOLVER_OPTIONS,
+    doh_url: Optional[str] = None
+) -> Optional[DnsResolverPort]:
+    """
+    Builds the resolver used to check records are visible before asking the provider to verify.
+    NONE disables the check.
+    """
+    if resolver_type == "DOH":
+        return DohDnsResolverAdapter(url=doh_url) if doh_url else DohDnsResolverAdapter()
+    elif resolver_type == "STATIC":
+        return StaticDnsResolverAdapter()
+    elif resolver_type == "NONE":
+        return None
+    
+    raise ValueError(f"Invalid DNS resolver type: {resolver_type}")
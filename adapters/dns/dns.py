@@ -5,4 +5,6 @@ from common_types import DNSRecord
 class DnsPort(Protocol):
     def create_records(self, domain: str, subdomain: str, records: List[DNSRecord]) -> bool: ...
     def delete_records(self, domain: str, subdomain: str) -> bool: ...
-    def exists_records(self, domain: str, subdomain: str) -> bool: ...
\ No newline at end of file
+    def exists_records(self, domain: str, subdomain: str) -> bool: ...
+    def get_records(self, domain: str, subdomain: str) -> List[DNSRecord]: ...
+    def delete_record(self, domain: str, record: DNSRecord) -> bool: ...
\ No newline at end of file
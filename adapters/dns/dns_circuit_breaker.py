@@ -0,0 +1,27 @@
+from typing import List
+from common_types import DNSRecord
+from adapters.circuit_breaker import CircuitBreaker
+from adapters.dns.dns import DnsPort
+
+class CircuitBreakerDnsAdapter(DnsPort):
+    """
+    Routes every provider call of the wrapped adapter through a circuit breaker
+    """
+    def __init__(self, dns: DnsPort, circuit_breaker: CircuitBreaker):
+        self.dns = dns
+        self.circuit_breaker = circuit_breaker
+
+    def create_records(self, domain: str, subdomain: str, records: List[DNSRecord]) -> bool:
+        return self.circuit_breaker.call("create_records", self.dns.create_records, domain, subdomain, records)
+
+    def delete_records(self, domain: str, subdomain: str) -> bool:
+        return self.circuit_breaker.call("delete_records", self.dns.delete_records, domain, subdomain)
+
+    def exists_records(self, domain: str, subdomain: str) -> bool:
+        return self.circuit_breaker.call("exists_records", self.dns.exists_records, domain, subdomain)
+
+    def get_records(self, domain: str, subdomain: str) -> List[DNSRecord]:
+        return self.circuit_breaker.call("get_records", self.dns.get_records, domain, subdomain)
+
+    def delete_record(self, domain: str, record: DNSRecord) -> bool:
+        return self.circuit_breaker.call("delete_record", self.dns.delete_record, domain, record)
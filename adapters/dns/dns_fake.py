@@ -0,0 +1,78 @@
+import threading
+
+from typing import Dict, List, Optional
+
+from common_types import DNSRecord
+from adapters.dns.dns import DnsPort
+from adapters.fake_latency import LatencyConfig, LatencyModel
+
+
+class FakeDnsAdapter(DnsPort):
+    """
+    In-memory stand in for Porkbun, used for local load testing.
+
+    Records are kept per apex domain, every call sleeps for a latency sampled from
+    `latency` and fails with its error rate.
+    """
+    def __init__(
+        self,
+        latency: Optional[LatencyConfig] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency = LatencyModel(latency or LatencyConfig(), seed=seed)
+
+        self.records: Dict[str, List[DNSRecord]] = {} # apex -> records, names are fully qualified
+        self._lock = threading.Lock()
+
+    def create_records(self, domain: str, subdomain: str, records: List[DNSRecord]) -> bool:
+        for record in records:
+            self.latency.simulate("create_records")
+
+            name = record.name if record.name.endswith(domain) else f"{record.name}.{domain}"
+            with self._lock:
+                self.records.setdefault(domain, []).append(
+                    record.model_copy(update={"name": name})
+                )
+
+        return True
+
+    def delete_records(self, domain: str, subdomain: str) -> bool:
+        self.latency.simulate("delete_records")
+
+        with self._lock:
+            self.records[domain] = [
+                record for record in self.records.get(domain, [])
+                if not record.name.endswith(subdomain + "." + domain)
+            ]
+
+        return True
+
+    def get_records(self, domain: str, subdomain: str) -> List[DNSRecord]:
+        self.latency.simulate("get_records")
+
+        with self._lock:
+            return [
+                record.model_copy() for record in self.records.get(domain, [])
+                if record.name == subdomain + "." + domain or record.name.endswith("." + subdomain + "." + domain)
+            ]
+
+    def delete_record(self, domain: str, record: DNSRecord) -> bool:
+        self.latency.simulate("delete_record")
+
+        name = record.name if record.name.endswith(domain) else f"{record.name}.{domain}"
+        with self._lock:
+            self.records[domain] = [
+                existing for existing in self.records.get(domain, [])
+                if not (existing.name == name and existing.record_type == record.record_type and existing.value == record.value)
+            ]
+
+        return True
+
+    def exists_records(self, domain: str, subdomain: str) -> bool:
+        self.latency.simulate("exists_records")
+
+        with self._lock:
+            return any(
+                record.name == subdomain + "." + domain
+                for record in self.records.get(domain, [])
+            )
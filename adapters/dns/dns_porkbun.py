@@ -1,7 +1,10 @@
 from typing import List
 from common_types import DNSRecord
 from adapters.dns.dns import DnsPort
-from adapters.dns.porkbun_wrapper import create_dns_records, delete_dns_records, exists_dns_records
+from adapters.dns.porkbun_wrapper import (
+    create_dns_records, delete_dns_records, exists_dns_records,
+    get_subdomain_dns_records, delete_matching_dns_record
+)
 
 class PorkbunDnsAdapter(DnsPort):
     def create_records(self, domain: str, subdomain: str, records: List[DNSRecord]) -> bool:
@@ -11,4 +14,10 @@ class PorkbunDnsAdapter(DnsPort):
         return delete_dns_records(domain, subdomain)
 
     def exists_records(self, domain: str, subdomain: str) -> bool:
-        return exists_dns_records(domain, subdomain)
\ No newline at end of file
+        return exists_dns_records(domain, subdomain)
+
+    def get_records(self, domain: str, subdomain: str) -> List[DNSRecord]:
+        return get_subdomain_dns_records(domain, subdomain)
+
+    def delete_record(self, domain: str, record: DNSRecord) -> bool:
+        return delete_matching_dns_record(domain, record)
\ No newline at end of file
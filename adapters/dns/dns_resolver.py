@@ -0,0 +1,44 @@
+from typing import Dict, List, Protocol, Tuple
+
+class DnsResolverPort(Protocol):
+    def resolve(self, name: str, record_type: str) -> List[str]:
+        """
+        Returns the values published for the name, normalized by `normalize_record_value`.
+        An empty list means nothing is published yet.
+        """
+        ...
+
+
+def normalize_record_value(record_type: str, value: str) -> str:
+    """
+    Normalizes a record value so expected and resolved values compare equal
+    """
+    value = value.strip()
+    
+    if record_type == "TXT":
+        # Long TXT values come back as several quoted strings
+        if value.startswith('"'):
+            return "".join(part for part in value.split('"')[1::2])
+        return value
+    
+    if record_type == "MX":
+        # Resolved MX data is prefixed with its priority
+        value = value.split()[-1]
+    
+    return value.rstrip(".").lower()
+
+
+class StaticDnsResolverAdapter(DnsResolverPort):
+    """
+    Resolves from an in-memory map, for tests and local runs without real DNS
+    """
+    def __init__(self, records: Dict[Tuple[str, str], List[str]] = None):
+        self.records = records or {} # (name, record_type) -> values
+
+    def publish(self, name: str, record_type: str, value: str):
+        self.records.setdefault((name.rstrip(".").lower(), record_type), []).append(
+            normalize_record_value(record_type, value)
+        )
+
+    def resolve(self, name: str, record_type: str) -> List[str]:
+        return list(self.records.get((name.rstrip(".").lower(), record_type), []))
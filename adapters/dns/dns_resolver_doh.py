@@ -0,0 +1,56 @@
+from typing import List
+
+from adapters.dns.dns_resolver import DnsResolverPort, normalize_record_value
+from util.http_session import build_pooled_session
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOH_URL = "https://cloudflare-dns.com/dns-query"
+
+# https://www.iana.org/assignments/dns-parameters
+RECORD_TYPE_CODES = {
+    "A": 1,
+    "CNAME": 5,
+    "MX": 15,
+    "TXT": 16,
+}
+
+NXDOMAIN = 3
+
+class DohDnsResolverAdapter(DnsResolverPort):
+    """
+    Resolves through a public DNS-over-HTTPS JSON endpoint, so we see what the rest of
+    the internet sees rather than a local cache
+    """
+    def __init__(self, url: str = DEFAULT_DOH_URL, timeout: float = 5, pool_size: int = 10):
+        self.url = url
+        self.timeout = timeout
+        
+        self.session = build_pooled_session(pool_size)
+
+    def resolve(self, name: str, record_type: str) -> List[str]:
+        response = self.session.get(
+            self.url,
+            params={"name": name, "type": record_type},
+            headers={"accept": "application/dns-json"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        response_json = response.json()
+        
+        status = response_json.get("Status", 0)
+        if status == NXDOMAIN:
+            return []
+        if status != 0:
+            raise Exception(f"DNS lookup failed for name={name}, type={record_type}, status={status}")
+        
+        # Answers can include the CNAME chain that led to the name
+        type_code = RECORD_TYPE_CODES.get(record_type)
+        
+        return [
+            normalize_record_value(record_type, answer["data"])
+            for answer in response_json.get("Answer", [])
+            if answer.get("type") == type_code
+        ]
@@ -1,11 +1,15 @@
 from adapters.dns.porkbun_wrapper.domain_management import (
     create_dns_records,
     delete_dns_records,
-    exists_dns_records
+    exists_dns_records,
+    get_subdomain_dns_records,
+    delete_matching_dns_record
 )
 
 __all__ = [
     "create_dns_records",
     "delete_dns_records",
-    "exists_dns_records"
+    "exists_dns_records",
+    "get_subdomain_dns_records",
+    "delete_matching_dns_record"
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
-import requests as req
 import os
+import threading
 from typing import Optional, Literal, List
 from pydantic import BaseModel
 
+from util.http_session import build_pooled_session
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -25,9 +27,19 @@ class DNSRecord(BaseModel):
     notes: str | None
 
 class PorkbunClient:
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        pool_size: int = 10,
+        timeout: float = 30
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.timeout = timeout
+        
+        # Keep-alive session, domain setup issues many calls in a row
+        self.session = build_pooled_session(pool_size)
         
     def create_dns_record(
         self,
@@ -37,7 +49,10 @@ class PorkbunClient:
         name: Optional[str] = None,
         ttl: Optional[int] = None,
         priority: Optional[int] = None
-    ) -> bool:
+    ) -> Optional[str]:
+        """
+        Creates the DNS record, returning its id or None if creation failed.
+        """
         payload = {
             "secretapikey": self.api_secret,
             "apikey": self.api_key,
@@ -51,12 +66,16 @@ class PorkbunClient:
         if priority is not None:
             payload["priority"] = priority
 
-        response = req.post(
+        response = self.session.post(
             DNS_CREATE_URI.format(domain=domain),
-            json=payload
+            json=payload,
+            timeout=self.timeout
         )
         
-        return response.status_code == 200
+        if response.status_code != 200:
+            return None
+        
+        return str(response.json()["id"])
     
     def get_dns_records(
         self,
@@ -64,21 +83,24 @@ class PorkbunClient:
     ) -> List[DNSRecord]:
         """
         Retrieves the DNS records for the given domain.
+        
+        Raises if the records could not be retrieved, so a failure is never mistaken for an empty zone.
         """
         payload = {
             "secretapikey": self.api_secret,
             "apikey": self.api_key,
         }
         
-        response = req.post(
+        response = self.session.post(
             DNS_GET_URI.format(domain=domain),
-            json=payload
+            json=payload,
+            timeout=self.timeout
         )
         
-        response_json = response.json()
-        
         if response.status_code != 200:
-            return []
+            raise Exception(f"Failed to retrieve DNS records for domain={domain}, status={response.status_code}")
+        
+        response_json = response.json()
         
         return [DNSRecord(**record) for record in response_json["records"]]
     
@@ -92,18 +114,28 @@ class PorkbunClient:
             "apikey": self.api_key,
         }
         
-        response = req.post(
+        response = self.session.post(
             DNS_DELETE_BY_ID_URI.format(domain=domain, id=record_id),
-            json=payload
+            json=payload,
+            timeout=self.timeout
         )
         
         return response.status_code == 200
     
 
-client = PorkbunClient(
-    api_key=os.getenv("PORKBUN_API_KEY"), 
-    api_secret=os.getenv("PORKBUN_API_SECRET")
-)
+client: Optional[PorkbunClient] = None
+_client_lock = threading.Lock()
 
 def get_client() -> PorkbunClient:
+    # Built on first use so credentials are read after the environment is loaded
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                client = PorkbunClient(
+                    api_key=os.getenv("PORKBUN_API_KEY"), 
+                    api_secret=os.getenv("PORKBUN_API_SECRET"),
+                    pool_size=int(os.getenv("PORKBUN_POOL_SIZE", "10")),
+                    timeout=float(os.getenv("PORKBUN_TIMEOUT", "30"))
+                )
     return client
\ No newline at end of file
@@ -1,39 +1,81 @@
 import logging
+import os
+import threading
 
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 from common_types import DNSRecord
-from adapters.dns.porkbun_wrapper.client import get_client
+from adapters.dns.porkbun_wrapper.client import get_client, DNSRecord as PorkbunDNSRecord
+from adapters.dns.porkbun_wrapper.record_cache import DnsRecordCache
 
 logger = logging.getLogger(__name__)
 
+record_cache: Optional[DnsRecordCache] = None
+_record_cache_lock = threading.Lock()
+
+def get_record_cache() -> DnsRecordCache:
+    global record_cache
+    if record_cache is None:
+        with _record_cache_lock:
+            if record_cache is None:
+                record_cache = DnsRecordCache(
+                    lambda domain: get_client().get_dns_records(domain),
+                    ttl=float(os.getenv("PORKBUN_RECORD_CACHE_TTL", "60"))
+                )
+    return record_cache
+
+executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    # Bounded so a burst of provisioning cannot exhaust the client's connection pool
+    global executor
+    if executor is None:
+        with _executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("PORKBUN_MAX_CONCURRENCY", os.getenv("PORKBUN_POOL_SIZE", "10"))),
+                    thread_name_prefix="porkbun"
+                )
+    return executor
+
 def create_dns_records(
     domain: str,
     subdomain: str,
     dns_records: List[DNSRecord],
 ) -> bool:
+    """
+    Creates the DNS records concurrently, if any of them fails the ones that were
+    created are deleted again so the subdomain is never left half provisioned
+    """
     logger.info(f"Creating DNS records for {domain} under {subdomain}")
-    client = get_client()
+    cache = get_record_cache()
     
-    records_created = 0
+    results: List[Tuple[DNSRecord, Optional[str]]] = list(get_executor().map(
+        lambda dns_record: (dns_record, _create_dns_record(domain, subdomain, dns_record)),
+        dns_records
+    ))
     
-    for dns_record in dns_records:
-        name = _extract_subdomain(dns_record.name, domain)
-        
-        success = client.create_dns_record(
-            domain=domain,
-            record_type=dns_record.record_type,
-            value=dns_record.value,
-            name=name,
-            priority=dns_record.priority,
-        )
-        
-        if not success:
-            logger.error(f"Failed to create DNS record={dns_record} for domain={domain} under {subdomain}")
-        else:
-            records_created += 1
-            
-    return records_created == len(dns_records)
+    created = [(dns_record, record_id) for dns_record, record_id in results if record_id is not None]
+    
+    if len(created) == len(dns_records):
+        for dns_record, record_id in created:
+            name = _extract_subdomain(dns_record.name, domain)
+            cache.add_record(domain, _to_porkbun_record(record_id, name, domain, dns_record))
+        return True
+    
+    logger.error(f"Created {len(created)}/{len(dns_records)} DNS records for domain={domain} under {subdomain}, rolling back")
+    
+    rolled_back = get_executor().map(
+        lambda record_id: _delete_dns_record(domain, record_id),
+        [record_id for _, record_id in created]
+    )
+    if not all(rolled_back):
+        # Leftovers are picked up by the next full fetch
+        cache.invalidate(domain)
+    
+    return False
     
 def delete_dns_records(
     domain: str,
@@ -42,34 +84,110 @@ def delete_dns_records(
     """
     Deletes the DNS records for the given subdomain under the domain
     """
-    client = get_client()
+    cache = get_record_cache()
     
-    records = client.get_dns_records(domain)
+    records = [
+        record for record in cache.get_records(domain)
+        if record.name.endswith(subdomain + "." + domain)
+    ]
     
-    failure_recorded = False
+    results = list(get_executor().map(
+        lambda record: _delete_dns_record(domain, record.id),
+        records
+    ))
     
-    for record in records:
-        if record.name.endswith(subdomain + "." + domain):
-            success = client.delete_dns_record(domain, record.id)
-            if not success:
-                logger.error(f"Failed to delete DNS record={record} for domain={domain} under {subdomain}")
-                failure_recorded = True
+    for record, success in zip(records, results):
+        if not success:
+            logger.error(f"Failed to delete DNS record={record} for domain={domain} under {subdomain}")
+        else:
+            cache.remove_record(domain, record.id)
                 
-    return not failure_recorded
+    return all(results)
 
 def exists_dns_records(
     domain: str,
     subdomain: str
 ) -> bool:
-    client = get_client()
+    return get_record_cache().name_exists(domain, subdomain + "." + domain)
+
+def get_subdomain_dns_records(
+    domain: str,
+    subdomain: str
+) -> List[DNSRecord]:
+    """
+    Gets the MX/TXT/CNAME records under the subdomain, with fully qualified names
+    """
+    return [
+        DNSRecord(
+            name=record.name,
+            record_type=record.type,
+            value=record.content,
+            priority=int(record.prio) if record.prio else None
+        )
+        for record in get_record_cache().get_records(domain)
+        if _is_under(record.name, subdomain, domain) and record.type in ["MX", "TXT", "CNAME"]
+    ]
+
+def delete_matching_dns_record(
+    domain: str,
+    dns_record: DNSRecord
+) -> bool:
+    """
+    Deletes the records with the same name, type and value as the given record
+    """
+    cache = get_record_cache()
+    name = dns_record.name if dns_record.name.endswith(domain) else f"{dns_record.name}.{domain}"
     
-    records = client.get_dns_records(domain)
+    success = True
+    for record in cache.get_records(domain):
+        if record.name == name and record.type == dns_record.record_type and record.content == dns_record.value:
+            if _delete_dns_record(domain, record.id):
+                cache.remove_record(domain, record.id)
+            else:
+                success = False
     
-    for record in records:
-        if record.name == subdomain + "." + domain:
-            return True
+    return success
+
+def _is_under(name: str, subdomain: str, domain: str) -> bool:
+    return name == f"{subdomain}.{domain}" or name.endswith(f".{subdomain}.{domain}")
+
+def _create_dns_record(domain: str, subdomain: str, dns_record: DNSRecord) -> Optional[str]:
+    try:
+        record_id = get_client().create_dns_record(
+            domain=domain,
+            record_type=dns_record.record_type,
+            value=dns_record.value,
+            name=_extract_subdomain(dns_record.name, domain),
+            priority=dns_record.priority,
+        )
+    except Exception as e:
+        logger.error(f"Failed to create DNS record={dns_record} for domain={domain} under {subdomain}: {e}")
+        return None
     
-    return False
+    if record_id is None:
+        logger.error(f"Failed to create DNS record={dns_record} for domain={domain} under {subdomain}")
+    return record_id
+
+def _delete_dns_record(domain: str, record_id: str) -> bool:
+    try:
+        return get_client().delete_dns_record(domain, record_id)
+    except Exception as e:
+        logger.error(f"Failed to delete DNS record id={record_id} for domain={domain}: {e}")
+        return False
+
+def _to_porkbun_record(record_id: str, name: str, domain: str, dns_record: DNSRecord) -> PorkbunDNSRecord:
+    """
+    Builds the record as Porkbun would return it, names are fully qualified
+    """
+    return PorkbunDNSRecord(
+        id=record_id,
+        name=f"{name}.{domain}" if name else domain,
+        type=dns_record.record_type,
+        content=dns_record.value,
+        ttl="600",
+        prio=str(dns_record.priority) if dns_record.priority is not None else None,
+        notes=None
+    )
 
 def _extract_subdomain(full_name: str, domain: str) -> str:
     if not full_name.endswith(domain):
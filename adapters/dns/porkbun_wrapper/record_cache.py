@@ -0,0 +1,101 @@
+import threading
+import time
+
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from adapters.dns.porkbun_wrapper.client import DNSRecord
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ApexRecords:
+    def __init__(self, records: List[DNSRecord]):
+        self.fetched_at = time.monotonic()
+        self.records: Dict[str, DNSRecord] = {record.id: record for record in records}
+        self.names = Counter(record.name for record in records)
+
+    def add(self, record: DNSRecord):
+        if record.id in self.records:
+            return
+        self.records[record.id] = record
+        self.names[record.name] += 1
+
+    def remove(self, record_id: str):
+        record = self.records.pop(record_id, None)
+        if record is None:
+            return
+        self.names[record.name] -= 1
+        if self.names[record.name] <= 0:
+            del self.names[record.name]
+
+
+class DnsRecordCache:
+    """
+    Caches the DNS records of each apex domain for `ttl` seconds.
+
+    Our own creates and deletes are applied to the cache directly, so only changes made
+    outside this process wait for the ttl to show up. Name lookups are dictionary lookups.
+
+    Every change to an apex moves its generation forward. A fetch that raced with a change
+    may predate it, so its result is returned to the caller but not cached.
+    """
+    def __init__(self, fetch_records: Callable[[str], List[DNSRecord]], ttl: float = 60):
+        self.fetch_records = fetch_records
+        self.ttl = ttl
+
+        self.apexes: Dict[str, ApexRecords] = {}
+        self.generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_records(self, domain: str) -> List[DNSRecord]:
+        apex = self._get_apex(domain)
+        with self._lock:
+            return list(apex.records.values())
+
+    def name_exists(self, domain: str, name: str) -> bool:
+        apex = self._get_apex(domain)
+        with self._lock:
+            return name in apex.names
+
+    def add_record(self, domain: str, record: DNSRecord):
+        with self._lock:
+            self._bump(domain)
+            apex = self.apexes.get(domain)
+            if apex is not None:
+                apex.add(record)
+
+    def remove_record(self, domain: str, record_id: str):
+        with self._lock:
+            self._bump(domain)
+            apex = self.apexes.get(domain)
+            if apex is not None:
+                apex.remove(record_id)
+
+    def invalidate(self, domain: str):
+        with self._lock:
+            self._bump(domain)
+            self.apexes.pop(domain, None)
+
+    def _get_apex(self, domain: str) -> ApexRecords:
+        with self._lock:
+            apex = self.apexes.get(domain)
+            if apex is not None and time.monotonic() - apex.fetched_at < self.ttl:
+                return apex
+            generation = self.generations.get(domain, 0)
+
+        logger.debug(f"Fetching DNS records for domain={domain}")
+        apex = ApexRecords(self.fetch_records(domain))
+
+        with self._lock:
+            if self.generations.get(domain, 0) == generation:
+                self.apexes[domain] = apex
+            else:
+                logger.debug(f"Discarding stale DNS records for domain={domain}")
+
+        return apex
+
+    def _bump(self, domain: str):
+        """Expects the lock to be held"""
+        self.generations[domain] = self.generations.get(domain, 0) + 1
@@ -1,12 +1,31 @@
 from .email_delivery import EmailDeliveryPort
 from .email_delivery_mailgun import MailgunEmailDeliveryAdapter
+from .email_delivery_fake import FakeEmailDeliveryAdapter
+from .email_delivery_circuit_breaker import CircuitBreakerEmailDeliveryAdapter
+from adapters.circuit_breaker import CircuitBreaker
+from adapters.fake_latency import LatencyConfig
 
-from typing import Literal
+from typing import Literal, Optional
 
-EMAIL_DELIVERY_OPTIONS = Literal["MAILGUN"]
+EMAIL_DELIVERY_OPTIONS = Literal["MAILGUN", "FAKE"]
 
-def build_email_delivery(email_delivery_type: EMAIL_DELIVERY_OPTIONS) -> EmailDeliveryPort:
+def build_email_delivery(
+    email_delivery_type: EMAIL_DELIVERY_OPTIONS,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    fake_latency: Optional[LatencyConfig] = None,
+    fake_verify_delay: float = 30.0
+) -> EmailDeliveryPort:
     if email_delivery_type == "MAILGUN":
-        return MailgunEmailDeliveryAdapter()
+        email_delivery = MailgunEmailDeliveryAdapter()
+    elif email_delivery_type == "FAKE":
+        email_delivery = FakeEmailDeliveryAdapter(
+            latency=fake_latency,
+            verify_delay=fake_verify_delay
+        )
     else:
         raise ValueError(f"Invalid email delivery type: {email_delivery_type}")
+    
+    if circuit_breaker is not None:
+        return CircuitBreakerEmailDeliveryAdapter(email_delivery, circuit_breaker)
+    
+    return email_delivery
@@ -0,0 +1,57 @@
+from typing import List, Callable
+from common_types import DNSRecord, InboundRoute
+from adapters.circuit_breaker import CircuitBreaker
+from adapters.email_delivery.email_delivery import EmailDeliveryPort
+
+class CircuitBreakerEmailDeliveryAdapter(EmailDeliveryPort):
+    """
+    Routes every provider call of the wrapped adapter through a circuit breaker
+    """
+    def __init__(self, email_delivery: EmailDeliveryPort, circuit_breaker: CircuitBreaker):
+        self.email_delivery = email_delivery
+        self.circuit_breaker = circuit_breaker
+
+    def create_subdomain(self, subdomain: str, domain: str) -> List[DNSRecord]:
+        return self.circuit_breaker.call("create_subdomain", self.email_delivery.create_subdomain, subdomain, domain)
+
+    def delete_subdomain(self, subdomain: str, domain: str) -> bool:
+        return self.circuit_breaker.call("delete_subdomain", self.email_delivery.delete_subdomain, subdomain, domain)
+
+    def subdomain_exists(self, subdomain: str, domain: str) -> bool:
+        return self.circuit_breaker.call("subdomain_exists", self.email_delivery.subdomain_exists, subdomain, domain)
+
+    def get_subdomain_records(self, subdomain: str, domain: str) -> List[DNSRecord]:
+        return self.circuit_breaker.call("get_subdomain_records", self.email_delivery.get_subdomain_records, subdomain, domain)
+
+    def verify_domain(self, full_domain: str) -> bool:
+        return self.circuit_breaker.call("verify_domain", self.email_delivery.verify_domain, full_domain)
+
+    def create_user(self, local_part: str, domain: str) -> str:
+        return self.circuit_breaker.call("create_user", self.email_delivery.create_user, local_part, domain)
+
+    def delete_user(self, local_part: str, domain: str) -> bool:
+        return self.circuit_breaker.call("delete_user", self.email_delivery.delete_user, local_part, domain)
+
+    def get_users(self, domain: str) -> List[str]:
+        return self.circuit_breaker.call("get_users", self.email_delivery.get_users, domain)
+
+    def send_email(self, from_email: str, to_email: str, subject: str, body: str) -> str:
+        return self.circuit_breaker.call("send_email", self.email_delivery.send_email, from_email, to_email, subject, body)
+
+    def send_batch(self, from_email: str, to_emails: List[str], subject: str, body: str) -> str:
+        return self.circuit_breaker.call("send_batch", self.email_delivery.send_batch, from_email, to_emails, subject, body)
+
+    def max_batch_size(self) -> int:
+        return self.email_delivery.max_batch_size()
+
+    def setup_inbound_email_processing(self, domain: str) -> bool:
+        return self.circuit_breaker.call("setup_inbound_email_processing", self.email_delivery.setup_inbound_email_processing, domain)
+
+    def get_inbound_routes(self, domain: str) -> List[InboundRoute]:
+        return self.circuit_breaker.call("get_inbound_routes", self.email_delivery.get_inbound_routes, domain)
+
+    def delete_inbound_route(self, route_id: str) -> bool:
+        return self.circuit_breaker.call("delete_inbound_route", self.email_delivery.delete_inbound_route, route_id)
+
+    def on_email_received(self, callback: Callable[[str, str], None]):
+        return self.email_delivery.on_email_received(callback)
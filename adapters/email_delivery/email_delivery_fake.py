@@ -0,0 +1,179 @@
+import threading
+import time
+import uuid
+
+from typing import Callable, Dict, List, Optional
+
+from common_types import DNSRecord, InboundRoute
+from adapters.email_delivery import EmailDeliveryPort
+from adapters.fake_latency import LatencyConfig, LatencyModel, FakeProviderError
+from util.domain_utils import parse_email
+from util.password_generator import generate_password
+
+import logging
+logger = logging.getLogger(__name__)
+
+FAKE_BATCH_LIMIT = 1000
+
+
+class FakeDomain:
+    def __init__(self, name: str):
+        self.name = name
+        self.created_at = time.monotonic()
+        self.verified = False
+        self.users: Dict[str, str] = {} # login -> password
+        self.records: List[DNSRecord] = []
+        self.routes: List[str] = []
+
+
+class FakeEmailDeliveryAdapter(EmailDeliveryPort):
+    """
+    In-memory stand in for Mailgun, used for local load testing.
+
+    Every call sleeps for a latency sampled from `latency` and fails with its error rate.
+    Like Mailgun, a new domain only verifies once its DNS has "propagated", which is
+    simulated as `verify_delay` seconds after it was created.
+    """
+    def __init__(
+        self,
+        latency: Optional[LatencyConfig] = None,
+        verify_delay: float = 30.0,
+        seed: Optional[int] = None
+    ):
+        self.latency = LatencyModel(latency or LatencyConfig(), seed=seed)
+        self.verify_delay = verify_delay
+
+        self.domains: Dict[str, FakeDomain] = {}
+        self.sent_messages = 0
+        self._lock = threading.Lock()
+
+    def create_subdomain(self, subdomain: str, domain: str) -> List[DNSRecord]:
+        self.latency.simulate("create_subdomain")
+        domain_name = f"{subdomain}.{domain}"
+
+        with self._lock:
+            if domain_name not in self.domains:
+                fake_domain = FakeDomain(domain_name)
+                fake_domain.records = [
+                    DNSRecord(name=subdomain, record_type="MX", value="mxa.mailgun.org", priority=10),
+                    DNSRecord(name=subdomain, record_type="MX", value="mxb.mailgun.org", priority=10),
+                    DNSRecord(name=domain_name, record_type="TXT", value="v=spf1 include:mailgun.org ~all"),
+                    DNSRecord(name=f"mx._domainkey.{domain_name}", record_type="TXT", value=f"k=rsa; p={uuid.uuid4().hex}"),
+                    DNSRecord(name=f"email.{domain_name}", record_type="CNAME", value="mailgun.org"),
+                ]
+                self.domains[domain_name] = fake_domain
+
+            return [record.model_copy() for record in self.domains[domain_name].records]
+
+    def get_subdomain_records(self, subdomain: str, domain: str) -> List[DNSRecord]:
+        self.latency.simulate("get_subdomain_records")
+
+        with self._lock:
+            fake_domain = self.domains.get(f"{subdomain}.{domain}")
+            if fake_domain is None:
+                raise FakeProviderError(f"Domain {subdomain}.{domain} not found")
+            return [record.model_copy() for record in fake_domain.records]
+
+    def delete_subdomain(self, subdomain: str, domain: str) -> bool:
+        self.latency.simulate("delete_subdomain")
+
+        with self._lock:
+            return self.domains.pop(f"{subdomain}.{domain}", None) is not None
+
+    def subdomain_exists(self, subdomain: str, domain: str) -> bool:
+        self.latency.simulate("subdomain_exists")
+
+        with self._lock:
+            return f"{subdomain}.{domain}" in self.domains
+
+    def verify_domain(self, full_domain: str) -> bool:
+        self.latency.simulate("verify_domain")
+
+        with self._lock:
+            fake_domain = self.domains.get(full_domain)
+            if fake_domain is None:
+                return False
+
+            if not fake_domain.verified and time.monotonic() - fake_domain.created_at >= self.verify_delay:
+                fake_domain.verified = True
+
+            return fake_domain.verified
+
+    def create_user(self, local_part: str, domain: str) -> str:
+        self.latency.simulate("create_user")
+
+        with self._lock:
+            fake_domain = self.domains.get(domain)
+            if fake_domain is None:
+                logger.error(f"Failed to create user on domain={domain}, local_part={local_part}")
+                return ""
+
+            password = generate_password(32)
+            fake_domain.users[f"{local_part}@{domain}"] = password
+            return password
+
+    def delete_user(self, local_part: str, domain: str) -> bool:
+        self.latency.simulate("delete_user")
+
+        with self._lock:
+            fake_domain = self.domains.get(domain)
+            if fake_domain is not None:
+                fake_domain.users.pop(f"{local_part}@{domain}", None)
+            return True
+
+    def get_users(self, domain: str) -> List[str]:
+        self.latency.simulate("get_users")
+
+        with self._lock:
+            fake_domain = self.domains.get(domain)
+            return list(fake_domain.users.keys()) if fake_domain else []
+
+    def send_email(self, from_email: str, to_email: str, subject: str, body: str) -> str:
+        return self.send_batch(from_email, [to_email], subject, body)
+
+    def send_batch(self, from_email: str, to_emails: List[str], subject: str, body: str) -> str:
+        if len(to_emails) > FAKE_BATCH_LIMIT:
+            raise ValueError(f"Batch of {len(to_emails)} recipients exceeds limit={FAKE_BATCH_LIMIT}")
+
+        self.latency.simulate("send_email")
+        _, domain = parse_email(from_email)
+
+        with self._lock:
+            if domain not in self.domains:
+                raise FakeProviderError(f"Failed to send email, domain={domain} not found")
+            self.sent_messages += len(to_emails)
+
+        return f"<{uuid.uuid4().hex}@{domain}>"
+
+    def max_batch_size(self) -> int:
+        return FAKE_BATCH_LIMIT
+
+    def setup_inbound_email_processing(self, domain: str) -> bool:
+        self.latency.simulate("setup_inbound_email_processing")
+
+        with self._lock:
+            fake_domain = self.domains.get(domain)
+            if fake_domain is None:
+                return False
+            fake_domain.routes.append(uuid.uuid4().hex)
+            return True
+
+    def get_inbound_routes(self, domain: str) -> List[InboundRoute]:
+        self.latency.simulate("get_inbound_routes")
+
+        with self._lock:
+            fake_domain = self.domains.get(domain)
+            routes = fake_domain.routes if fake_domain else []
+            return [InboundRoute(route_id=route_id, domain=domain, up_to_date=True) for route_id in routes]
+
+    def delete_inbound_route(self, route_id: str) -> bool:
+        self.latency.simulate("delete_inbound_route")
+
+        with self._lock:
+            for fake_domain in self.domains.values():
+                if route_id in fake_domain.routes:
+                    fake_domain.routes.remove(route_id)
+            return True
+
+    def on_email_received(self, callback: Callable[[str, str], None]):
+        ...
@@ -1,13 +1,16 @@
 from typing import List
-from common_types import DNSRecord
+from common_types import DNSRecord, InboundRoute
 from adapters.email_delivery import EmailDeliveryPort
 from adapters.email_delivery.mailgun_wrapper import (
     create_subdomain_on_eds, delete_subdomain_on_eds,
     subdomain_exists_on_eds, verify_domain_on_eds,
+    get_subdomain_records_on_eds,
     create_user_on_eds, delete_user_on_eds,
     get_users_on_eds, send_email_on_eds,
+    send_batch_on_eds, MAILGUN_BATCH_LIMIT,
     set_inbound_email_webhook,
-    delete_routes
+    get_routes, delete_route,
+    delete_routes, forward_action
 )
 
 MAILGUN_WEBHOOK_URL = "https://ba6fdf7f950f.ngrok-free.app/mailgun/webhooks/inbound"
@@ -25,6 +28,9 @@ class MailgunEmailDeliveryAdapter(EmailDeliveryPort):
     def subdomain_exists(self, subdomain: str, domain: str) -> bool:
         return subdomain_exists_on_eds(subdomain, domain)
 
+    def get_subdomain_records(self, subdomain: str, domain: str) -> List[DNSRecord]:
+        return get_subdomain_records_on_eds(subdomain, domain)
+
     def verify_domain(self, full_domain: str) -> bool:
         return verify_domain_on_eds(full_domain)
 
@@ -35,7 +41,7 @@ class MailgunEmailDeliveryAdapter(EmailDeliveryPort):
         return delete_user_on_eds(local_part, domain)
     
     def get_users(self, domain: str) -> List[str]:
-        return get_users_on_eds(domain)
+        return list(get_users_on_eds(domain))
     
     def send_email(self, from_email: str, to_email: str, subject: str, body: str) -> str:
         return send_email_on_eds(
@@ -45,5 +51,28 @@ class MailgunEmailDeliveryAdapter(EmailDeliveryPort):
             body
         )
     
+    def send_batch(self, from_email: str, to_emails: List[str], subject: str, body: str) -> str:
+        return send_batch_on_eds(
+            from_email,
+            to_emails,
+            subject,
+            body
+        )
+    
+    def max_batch_size(self) -> int:
+        return MAILGUN_BATCH_LIMIT
+    
     def setup_inbound_email_processing(self, domain: str) -> bool:
-        return set_inbound_email_webhook(domain, MAILGUN_WEBHOOK_URL)
\ No newline at end of file
+        return set_inbound_email_webhook(domain, MAILGUN_WEBHOOK_URL)
+    
+    def get_inbound_routes(self, domain: str) -> List[InboundRoute]:
+        return [
+            InboundRoute(
+                route_id=route.id,
+                domain=domain,
+                up_to_date=forward_action(MAILGUN_WEBHOOK_URL) in route.actions
+            ) for route in get_routes(domain)
+        ]
+    
+    def delete_inbound_route(self, route_id: str) -> bool:
+        return delete_route(route_id)
\ No newline at end of file
@@ -1,10 +1,93 @@
-from mailgun.client import Client
+from mailgun.client import Client, Endpoint
+from mailgun.handlers.error_handler import ApiError
+from util.http_session import build_pooled_session
 
+from typing import Any, Optional, Tuple
+
+import requests
+import threading
 import os
 
-auth = ("api", os.getenv("MAILGUN_API_KEY"))
 
-mg = Client(auth=auth)
+class PooledEndpoint(Endpoint):
+    """
+    Mailgun endpoint that sends its requests over a shared keep-alive session
+    instead of the module level `requests` functions.
+    """
+    session: requests.Session
+    default_timeout: float
+
+    def api_call(
+        self,
+        auth: Optional[Tuple[str, str]],
+        method: str,
+        url: dict,
+        headers: dict,
+        data: Any = None,
+        filters: Any = None,
+        timeout: Optional[float] = None,
+        files: Any = None,
+        domain: Optional[str] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        url = self.build_url(url, domain=domain, method=method, **kwargs)
+
+        try:
+            return self.session.request(
+                method,
+                url,
+                data=data,
+                params=filters,
+                headers=headers,
+                auth=auth,
+                timeout=timeout or self.default_timeout,
+                files=files,
+                verify=True,
+                stream=False,
+            )
+        except requests.exceptions.Timeout:
+            raise TimeoutError
+        except requests.RequestException as e:
+            raise ApiError(e)
+
+
+class PooledClient(Client):
+    def __init__(
+        self,
+        auth: Optional[Tuple[str, str]] = None,
+        pool_size: int = 10,
+        timeout: float = 30,
+        **kwargs: Any
+    ):
+        super().__init__(auth=auth, **kwargs)
+        self.session = build_pooled_session(pool_size)
+        self.timeout = timeout
+
+    def __getattr__(self, name: str) -> Any:
+        split = name.split("_")
+        fname = split[0]
+        url, headers = self.config[name]
+
+        endpoint_type = type(fname, (PooledEndpoint,), {
+            "session": self.session,
+            "default_timeout": self.timeout
+        })
+
+        return endpoint_type(url=url, headers=headers, auth=self.auth)
+
+
+mg: Optional[PooledClient] = None
+_client_lock = threading.Lock()
 
 def get_client() -> Client:
+    # Built on first use so credentials are read after the environment is loaded
+    global mg
+    if mg is None:
+        with _client_lock:
+            if mg is None:
+                mg = PooledClient(
+                    auth=("api", os.getenv("MAILGUN_API_KEY")),
+                    pool_size=int(os.getenv("MAILGUN_POOL_SIZE", "10")),
+                    timeout=float(os.getenv("MAILGUN_TIMEOUT", "30"))
+                )
     return mg
@@ -1,13 +1,28 @@
 from adapters.email_delivery.mailgun_wrapper.client import get_client
+from adapters.email_delivery.mailgun_wrapper.pagination import iter_items, DEFAULT_PAGE_SIZE
 from common_types import DNSRecord
 
-from typing import List, Dict, Optional, Literal
-from pydantic import BaseModel, Field
+from typing import Iterator, List, Dict, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+class DomainItem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    name: str
+    state: str = ""
+
+class DnsRecordVerification(BaseModel):
+    is_active: bool
+    cached: list
+    record_type: str
+    valid: Literal['unknown', 'valid']
+    value: str
+    name: str = Field(default="")
+
 def create_subdomain_on_eds(subdomain: str, domain: str) -> List[DNSRecord]:
     """
     Create the subdomain upon the given domain.
@@ -70,34 +85,54 @@ def subdomain_exists_on_eds(subdomain: str, domain: str) -> bool:
     
     raise Exception(f"Unexpected response code={response.status_code} for domain={domain_name}")
 
-def get_domains_on_eds() -> List[str]:
+def get_subdomain_records_on_eds(subdomain: str, domain: str) -> List[DNSRecord]:
+    """
+    Gets the DNS records the existing subdomain needs, as create_subdomain_on_eds returns them
+    """
     client = get_client()
     
-    response = client.domains.get()
+    domain_name = f"{subdomain}.{domain}"
+    
+    response = client.domains.get(domain_name=domain_name)
+    
+    if response.status_code != 200:
+        raise Exception(f"Unexpected response code={response.status_code} for domain={domain_name}")
     
     response_json = response.json()
     
-    return [domain["name"] for domain in response_json["items"]]
+    all_records = _parse_dns_records(response_json["receiving_dns_records"]) + _parse_dns_records(response_json["sending_dns_records"])
+    
+    for record in all_records:
+        if record.name == "":
+            record.name = subdomain
+    
+    return all_records
 
-def get_subdomains_on_eds(domain: str) -> List[str]:
+def iter_domain_items_on_eds(search: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[DomainItem]:
+    """
+    Yields the domains of the account a page at a time, raises if a page could not be listed
+    """
     client = get_client()
     
-    response = client.domains.get(domain=domain)
+    def _fetch_page(filters):
+        if search:
+            filters = {**filters, "search": search}
+        return client.domains.get(filters=filters)
     
-    response_json = response.json()
-    
-    return [subdomain["name"] for subdomain in response_json["items"]]
+    for item in iter_items(_fetch_page, page_size, "domains"):
+        yield DomainItem.model_validate(item)
+
+def get_domains_on_eds(page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[str]:
+    for item in iter_domain_items_on_eds(page_size=page_size):
+        yield item.name
+
+def get_subdomains_on_eds(domain: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[str]:
+    # Mailgun searches by partial name, so matches are narrowed to actual subdomains
+    for item in iter_domain_items_on_eds(search=domain, page_size=page_size):
+        if item.name.endswith(f".{domain}"):
+            yield item.name
 
 def verify_domain_on_eds(domain: str) -> bool:
-    class DnsRecordVerification(BaseModel):
-        is_active: bool
-        cached: list
-        record_type: str
-        valid: Literal['unknown', 'valid']
-        value: str
-        name: str = Field(default="")
-    
-    
     client = get_client()
     
     logger.info(f"Attempting to verify domain={domain}")
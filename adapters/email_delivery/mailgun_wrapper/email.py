@@ -2,9 +2,14 @@ from adapters.email_delivery.mailgun_wrapper.client import get_client
 
 from typing import List
 
+import json
+
 import logging
 logger = logging.getLogger(__name__)
 
+# Mailgun accepts at most 1000 recipients per batch send
+MAILGUN_BATCH_LIMIT = 1000
+
 def send_email_on_eds(
     from_email: str,
     to_email: str, 
@@ -36,4 +41,45 @@ def send_email_on_eds(
     data = req.json()
     email_id = data["id"]
     
-    return email_id
\ No newline at end of file
+    return email_id
+
+def send_batch_on_eds(
+    from_email: str,
+    to_emails: List[str],
+    subject: str,
+    body: str
+) -> str:
+    """
+    Sends the email to every recipient in a single API call.
+
+    Recipient variables make Mailgun deliver an individual message per recipient,
+    so recipients do not see each other.
+    """
+    if len(to_emails) > MAILGUN_BATCH_LIMIT:
+        raise ValueError(f"Batch of {len(to_emails)} recipients exceeds limit={MAILGUN_BATCH_LIMIT}")
+    
+    client = get_client()
+    
+    data = {
+        "from": from_email,
+        "to": to_emails,
+        "subject": subject,
+        "html": body,
+        "recipient-variables": json.dumps({to_email: {} for to_email in to_emails}),
+    }
+    
+    _, domain = from_email.split("@", 1)
+    
+    req = client.messages.create(
+        data=data,
+        domain=domain
+    )
+    
+    if req.status_code != 200:
+        logger.error(f"Failed to send batch email, resp={req.json()}")
+        raise Exception(f"Failed to send batch email, resp={req.json()}")
+    
+    data = req.json()
+    email_id = data["id"]
+    
+    return email_id
@@ -0,0 +1,41 @@
+from typing import Any, Callable, Dict, Iterator
+
+import requests
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Mailgun's maximum page size for its listings
+MAILGUN_PAGE_LIMIT = 1000
+DEFAULT_PAGE_SIZE = 100
+
+def iter_items(
+    fetch_page: Callable[[Dict[str, Any]], requests.Response],
+    page_size: int = DEFAULT_PAGE_SIZE,
+    description: str = "items"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the raw items of a Mailgun listing, fetching the next page only once the
+    previous one has been consumed. fetch_page is called with the limit/skip filters.
+
+    Raises if a page could not be listed
+    """
+    page_size = max(1, min(page_size, MAILGUN_PAGE_LIMIT))
+    skip = 0
+
+    while True:
+        response = fetch_page({"limit": page_size, "skip": skip})
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to list {description}, skip={skip}, status={response.status_code}")
+
+        response_json = response.json()
+        items = response_json.get("items", [])
+
+        yield from items
+
+        skip += len(items)
+        total_count = response_json.get("total_count")
+
+        if len(items) < page_size or (total_count is not None and skip >= total_count):
+            return
@@ -1,11 +1,18 @@
 from adapters.email_delivery.mailgun_wrapper.client import get_client
+from adapters.email_delivery.mailgun_wrapper.pagination import iter_items, DEFAULT_PAGE_SIZE
 from util.password_generator import generate_password
-from typing import List
+from typing import Iterator
 from pydantic import BaseModel
 
 import logging
 logger = logging.getLogger(__name__)
 
+class UserItem(BaseModel):
+    mailbox: str
+    login: str
+    created_at: str
+    size_bytes: int | None
+
 def create_user_on_eds(local_part: str, domain: str) -> str:
     """
     Create a user on the given domain.
@@ -46,31 +53,16 @@ def delete_user_on_eds(local_part: str, domain: str) -> bool:
     
     return response.status_code == 200
 
-def get_users_on_eds(domain: str) -> List[str]:
-    class UserItem(BaseModel):
-        mailbox: str
-        login: str
-        created_at: str
-        size_bytes: int | None
-    
+def get_users_on_eds(domain: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[str]:
+    """
+    Yields the mailboxes on the domain a page at a time, raises if a page could not be listed
+    """
     client = get_client()
     
     logger.info(f"Getting users on domain={domain}")
     
-    response = client.domains_credentials.get(
-        domain=domain
-    )
-    
-    response_json = response.json()
-    
-    items = response_json["items"]
-    
-    users = []
-    
-    for item in items:
-        item = UserItem.model_validate(item)
-        users.append(item.mailbox)
-    
-    return users
+    def _fetch_page(filters):
+        return client.domains_credentials.get(domain=domain, filters=filters)
     
-    
\ No newline at end of file
+    for item in iter_items(_fetch_page, page_size, f"users on domain={domain}"):
+        yield UserItem.model_validate(item).mailbox
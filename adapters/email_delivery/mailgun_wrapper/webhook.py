@@ -1,44 +1,67 @@
-from typing import List
+from typing import Iterator, List
+
+from pydantic import BaseModel, Field
 
 from .client import get_client
+from .pagination import iter_items, MAILGUN_PAGE_LIMIT
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Route(BaseModel):
+    id: str
+    expression: str
+    actions: List[str] = Field(default_factory=list)
+    description: str = ""
+
+def route_expression(domain: str) -> str:
+    # Routes are account wide, the expression is what ties a route to its domain
+    return f"match_recipient('.*@{domain}')"
+
+def forward_action(webhook_url: str) -> str:
+    return f"forward('{webhook_url}')"
 
 def set_inbound_email_webhook(domain: str, webhook_url: str):
     client = get_client()
     
-    forward_action = f"forward('{webhook_url}')"
     stop_action = "stop()"
     
     data = {
         "priority": 0,
         "description": "Inbound email webhook",
-        "expression": "catch_all()",
-        "action": [forward_action, stop_action],
+        "expression": route_expression(domain),
+        "action": [forward_action(webhook_url), stop_action],
     }
     
     req = client.routes.create(domain=domain, data=data)
     
     return req.status_code == 200
 
-def get_routes(domain: str) -> List[str]:
+def get_routes(domain: str, page_size: int = MAILGUN_PAGE_LIMIT) -> Iterator[Route]:
+    """
+    Yields the routes of the domain, raises if they could not be listed.
+    
+    Routes are account wide, so every page is scanned for the domain's expression
+    """
     client = get_client()
     
-    req = client.routes.get(domain=domain)
+    expression = route_expression(domain)
     
-    if req.status_code != 200:
-        return []
+    for item in iter_items(lambda filters: client.routes.get(filters=filters), page_size, "routes"):
+        route = Route.model_validate(item)
+        if route.expression == expression:
+            yield route
+
+def delete_route(route_id: str) -> bool:
+    client = get_client()
     
-    data = req.json()
-    items = data["items"]
-    results = []
-    for item in items:
-        results.append(item["id"])
+    req = client.routes.delete(route_id=route_id)
     
-    return results
+    # Route not found -> Success
+    return req.status_code in [200, 404]
 
 def delete_routes(domain: str):
-    route_ids = get_routes(domain)
-    
-    client = get_client()
-    
-    for route_id in route_ids:
-        client.routes.delete(domain=domain, route_id=route_id)
+    # Listed up front, deleting while paging would shift the later pages
+    for route in list(get_routes(domain)):
+        if not delete_route(route.id):
+            logger.error(f"Failed to delete route={route.id} of domain={domain}")
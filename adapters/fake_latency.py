@@ -0,0 +1,47 @@
+import math
+import random
+import threading
+import time
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class FakeProviderError(Exception): ...
+
+
+class LatencyConfig(BaseModel):
+    median_ms: float = 120.0
+    p99_ms: float = 900.0
+    error_rate: float = 0.0
+
+
+class LatencyModel:
+    """
+    Simulates the response time and failures of a remote provider.
+
+    Latencies follow a log-normal distribution fitted to the configured median and p99,
+    which matches the long tail of real HTTP APIs far better than a constant delay.
+    """
+    # z-score of the 99th percentile of a standard normal distribution
+    _P99_Z = 2.326
+
+    def __init__(self, config: LatencyConfig, seed: Optional[int] = None):
+        self.config = config
+        self.mu = math.log(max(config.median_ms, 0.001))
+        self.sigma = max(math.log(max(config.p99_ms, config.median_ms, 0.001) / max(config.median_ms, 0.001)) / self._P99_Z, 0.0)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def simulate(self, operation: str):
+        """Sleep for a sampled latency, then fail with the configured error rate"""
+        with self._lock:
+            latency_ms = self._random.lognormvariate(self.mu, self.sigma) if self.config.median_ms > 0 else 0.0
+            failed = self._random.random() < self.config.error_rate
+
+        time.sleep(latency_ms / 1000)
+
+        if failed:
+            raise FakeProviderError(f"Simulated provider failure during {operation}")
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel, EmailStr
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 
 class DNSRecord(BaseModel):
@@ -13,16 +13,30 @@ class DNSRecord(BaseModel):
     def __repr__(self) -> str:
         return f"DNSRecord(name={self.name}, priority={self.priority}, record_type={self.record_type}, value={self.value})"
 
+class InboundRoute(BaseModel):
+    route_id: str
+    domain: str
+    up_to_date: bool # Forwards to the webhook we currently expect
+
 class InboxRecord(BaseModel):
     inbox_id: str
     email: str
 
-class EmailRecord(BaseModel):
+OUTBOUND_STATUS = Literal["pending", "sending", "sent", "failed", "unknown"] # unknown: the provider timed out, it may have sent
+
+class OutboundEmailRecord(BaseModel):
+    message_id: str # Handle returned to the caller
+    inbox_id: str
     from_email: str
-    to_email: str
+    recipients: List[str] # Several for a batch, sent with one provider call
     subject: str
     body: str
-    message_time: datetime
+    status: OUTBOUND_STATUS
+    attempts: int = 0
+    provider_message_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
 
 class IncomingEmailRecord(BaseModel):
     message_id: str
@@ -2,10 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import v1_router, mailgun_router
 from contextlib import asynccontextmanager
-from services import build_inbox_service, build_domain_service, EmailServiceProvider
-from storage import compose_storage_manager, InboxStorageManager, EmailAccountStorage
-from adapters import build_email_delivery, build_dns
+from services import build_inbox_service, build_domain_service, build_send_queue, build_rate_limiter, build_email_scheduler, EmailServiceProvider
+from storage import compose_storage_manager, load_inbox_index, InboxStorageManager, EmailAccountStorage, InboxTombstoneStorage, OutboxStorage, ScheduledEmailStorage, DomainVerificationStorage, DomainStorage
+from adapters import build_email_delivery, build_dns, build_dns_resolver, CircuitBreaker, LatencyConfig
 from util.logging_config import configure_logging
+from util.webhook_verifier import WebhookVerifier
+
+import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -13,31 +16,131 @@ async def lifespan(app: FastAPI):
     
     app.state.storage_manager = compose_storage_manager()
     
-    app.state.inbox_storage_manager = InboxStorageManager(app.state.storage_manager)
+    # Shared, so deleting an inbox sees every email the inbox storages have saved
+    app.state.inbox_index = load_inbox_index(app.state.storage_manager)
+    
+    app.state.inbox_tombstone_storage = InboxTombstoneStorage(
+        app.state.storage_manager,
+        app.state.inbox_index
+    )
+    
+    app.state.inbox_storage_manager = InboxStorageManager(
+        app.state.storage_manager,
+        app.state.inbox_tombstone_storage,
+        app.state.inbox_index
+    )
+    
+    app.state.email_delivery_circuit_breaker = CircuitBreaker(
+        "mailgun",
+        default_timeout=float(os.getenv("MAILGUN_TIMEOUT", "30")),
+        timeouts={"send_batch": 60}
+    )
+    app.state.dns_circuit_breaker = CircuitBreaker(
+        "porkbun",
+        default_timeout=float(os.getenv("PORKBUN_TIMEOUT", "30"))
+    )
+    app.state.circuit_breakers = [
+        app.state.email_delivery_circuit_breaker,
+        app.state.dns_circuit_breaker
+    ]
+    
+    # FAKE providers simulate the APIs locally, eg. for load testing
+    fake_latency = LatencyConfig(
+        median_ms=float(os.getenv("FAKE_LATENCY_MEDIAN_MS", "120")),
+        p99_ms=float(os.getenv("FAKE_LATENCY_P99_MS", "900")),
+        error_rate=float(os.getenv("FAKE_ERROR_RATE", "0"))
+    )
+    
+    app.state.email_delivery = build_email_delivery(
+        os.getenv("EMAIL_DELIVERY_PROVIDER", "MAILGUN"),
+        app.state.email_delivery_circuit_breaker,
+        fake_latency=fake_latency,
+        fake_verify_delay=float(os.getenv("FAKE_VERIFY_DELAY", "30"))
+    )
+    app.state.dns = build_dns(
+        os.getenv("DNS_PROVIDER", "PORKBUN"),
+        app.state.dns_circuit_breaker,
+        fake_latency=fake_latency
+    )
+    
+    # Checks DNS has propagated before asking the provider to verify, FAKE records are never published
+    app.state.dns_resolver = build_dns_resolver(
+        os.getenv("DNS_RESOLVER", "DOH" if os.getenv("DNS_PROVIDER", "PORKBUN") == "PORKBUN" else "NONE"),
+        doh_url=os.getenv("DNS_RESOLVER_DOH_URL")
+    )
+    
+    app.state.email_account_storage = EmailAccountStorage(
+        app.state.storage_manager,
+        app.state.inbox_tombstone_storage
+    )
     
-    app.state.email_delivery = build_email_delivery("MAILGUN")
-    app.state.dns = build_dns("PORKBUN")
+    app.state.outbox_storage = OutboxStorage(app.state.storage_manager)
     
-    app.state.email_account_storage = EmailAccountStorage(app.state.storage_manager)
+    app.state.send_queue = build_send_queue(
+        app.state.email_delivery,
+        app.state.inbox_storage_manager,
+        app.state.outbox_storage,
+        workers=int(os.getenv("SEND_QUEUE_WORKERS", "4")),
+        rate_limiter=build_rate_limiter(
+            default_rate=float(os.getenv("SEND_RATE_PER_SECOND", "10")),
+            domain_rates=os.getenv("SEND_RATE_LIMITS", "")
+        )
+    )
     
     app.state.email_service_provider = EmailServiceProvider(
         app.state.email_delivery,
         app.state.inbox_storage_manager,
-        app.state.email_account_storage
+        app.state.email_account_storage,
+        app.state.send_queue
+    )
+    
+    app.state.scheduled_email_storage = ScheduledEmailStorage(app.state.storage_manager)
+    
+    app.state.email_scheduler = build_email_scheduler(
+        app.state.email_service_provider,
+        app.state.scheduled_email_storage,
+        app.state.outbox_storage
     )
     
+    app.state.domain_storage = DomainStorage(app.state.storage_manager)
+    
     app.state.inbox_service = build_inbox_service(
         app.state.storage_manager,
         app.state.email_delivery,
-        app.state.email_account_storage
+        app.state.email_account_storage,
+        app.state.domain_storage,
+        app.state.inbox_tombstone_storage,
+        create_concurrency=int(os.getenv("INBOX_CREATE_CONCURRENCY", "8")),
+        delete_concurrency=int(os.getenv("INBOX_DELETE_CONCURRENCY", "8")),
+        on_inboxes_deleted=app.state.email_service_provider.evict_inboxes
     )
     
+    app.state.domain_verification_storage = DomainVerificationStorage(app.state.storage_manager)
+    
     app.state.domain_service = build_domain_service(
         app.state.email_delivery,
-        app.state.dns
+        app.state.dns,
+        app.state.domain_storage,
+        app.state.domain_verification_storage,
+        app.state.dns_resolver,
+        verify_concurrency=int(os.getenv("DNS_VERIFY_CONCURRENCY", "16")),
+        verify_timeout=float(os.getenv("DNS_VERIFY_TIMEOUT", "30")),
+        provision_concurrency=int(os.getenv("DOMAIN_PROVISION_CONCURRENCY", "8")),
+        reconcile_interval=float(os.getenv("DOMAIN_RECONCILE_INTERVAL", "900"))
+    )
+    
+    app.state.webhook_verifier = WebhookVerifier(
+        os.getenv("MAILGUN_WEBHOOK_SIGNING_KEY")
     )
     
     yield
+    
+    app.state.email_scheduler.shutdown()
+    app.state.send_queue.shutdown()
+    app.state.domain_service.shutdown()
+    
+    for circuit_breaker in app.state.circuit_breakers:
+        circuit_breaker.shutdown()
 
 
 app = FastAPI(
@@ -1,10 +1,7 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
 from services import IEmailService
 from common_types import IncomingEmailRecord
-
-import hmac
-import hashlib
-import os
+from util.webhook_verifier import WebhookVerifier, WebhookVerificationResult
 
 router = APIRouter(prefix="/mailgun", tags=["mailgun"])
 
@@ -13,6 +10,9 @@ def get_email_service(request: Request, email: str) -> IEmailService:
         email
     )
 
+def get_webhook_verifier(request: Request) -> WebhookVerifier:
+    return request.app.state.webhook_verifier
+
 @router.post(
     "/webhooks/inbound",
     summary="Mailgun inbound webhook endpoint"
@@ -26,8 +26,14 @@ async def inbound_webhook(
     signature = form.get("signature")
     timestamp = form.get("timestamp")
     
-    # Verify signature
-    if not verify_webhook_signature(timestamp, token, signature):
+    # Verify the signature, then reject replays, before touching the payload
+    webhook_verifier = get_webhook_verifier(request)
+    verification = webhook_verifier.verify(timestamp, token, signature)
+    
+    if verification == WebhookVerificationResult.REPLAYED:
+        # 406 tells Mailgun not to retry
+        raise HTTPException(status_code=406, detail="replayed token")
+    if verification != WebhookVerificationResult.VALID:
         raise HTTPException(status_code=401, detail="invalid signature")
 
     sender = form.get("From")
@@ -38,32 +44,23 @@ async def inbound_webhook(
     stripped_text = form.get("stripped-text")
     reply_id = form.get("In-Reply-To")
     
-    email_service = get_email_service(request, recipient)
+    try:
+        email_service = get_email_service(request, recipient)
 
-    incoming_email_request = IncomingEmailRecord(
-        message_id=message_id,
-        sender=sender,
-        recipient=recipient,
-        subject=subject,
-        body=stripped_html,
-        reply_id=reply_id,
-        timestamp=timestamp
-    )
-    
-    email_service.handle_incoming_email(incoming_email_request)
+        incoming_email_request = IncomingEmailRecord(
+            message_id=message_id,
+            sender=sender,
+            recipient=recipient,
+            subject=subject,
+            body=stripped_html,
+            reply_id=reply_id,
+            timestamp=timestamp
+        )
+        
+        email_service.handle_incoming_email(incoming_email_request)
+    except Exception:
+        # Allow Mailgun to retry this delivery
+        webhook_verifier.forget(token)
+        raise
     
     return {"status": "ok"}
-
-def verify_webhook_signature(timestamp: str, token: str, signature: str) -> bool:
-    """
-    Verifies Mailgun webhook signature using HMAC SHA256.
-
-    According to Mailgun, signature = HMAC(api_key, timestamp + token).
-    """
-    api_key = os.getenv("MAILGUN_WEBHOOK_SIGNING_KEY")
-    if not api_key or not timestamp or not token or not signature:
-        return False
-
-    signed_bytes = f"{timestamp}{token}".encode("utf-8")
-    digest = hmac.new(api_key.encode("utf-8"), msg=signed_bytes, digestmod=hashlib.sha256).hexdigest()
-    return hmac.compare_digest(digest, signature)
@@ -1,11 +1,23 @@
 
-from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi import APIRouter, Request, Response, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from datetime import datetime
+from typing import Iterator, Optional
+
+import time
+import uuid
 
 from schemas import *
-from services import IInboxService, IDomainService, IEmailService
+from services import IInboxService, IDomainService, IEmailService, EmailScheduler
 
 from services.errors import DomainVerificationError
+from storage import EmailQuery, StoredEmail
+from adapters import CircuitOpenError, CircuitTimeoutError
+from util.cursor import encode_cursor, decode_cursor
 
+# Routes that call the email delivery or DNS providers are plain defs, FastAPI runs them in
+# its threadpool so a slow provider never blocks the event loop
 router = APIRouter(prefix="/v1", tags=["v1"])
 
 def get_domain_service(request: Request) -> IDomainService:
@@ -15,15 +27,50 @@ def get_inbox_service(request: Request) -> IInboxService:
     return request.app.state.inbox_service
 
 def get_email_service(request: Request, inbox_id: str) -> IEmailService:
-    return request.app.state.email_service_provider.get_by_inbox_id(
-        inbox_id
+    try:
+        return request.app.state.email_service_provider.get_by_inbox_id(
+            inbox_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def get_email_scheduler(request: Request) -> EmailScheduler:
+    return request.app.state.email_scheduler
+
+# Versions restart with the process, the epoch keeps ETags from before a restart from matching
+ETAG_EPOCH = uuid.uuid4().hex[:12]
+
+def make_etag(version: int, variant: str = "") -> str:
+    return f'"{ETAG_EPOCH}-{version}{variant}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+@router.get(
+    "/providers",
+    summary="Circuit breaker state of the external providers",
+    response_model=ProviderStatusResponse
+)
+async def get_provider_status(
+    request: Request
+) -> ProviderStatusResponse:
+    return ProviderStatusResponse(
+        providers=[
+            ProviderStatus(**circuit_breaker.get_state().model_dump())
+            for circuit_breaker in request.app.state.circuit_breakers
+        ]
     )
 
 @router.post(
     "/domain",
     summary="Attempts to create a domain"
 )
-async def create_domain(
+def create_domain(
     payload: CreateDomainRequest,
     domain_service: IDomainService = Depends(get_domain_service)
 ) -> CreateDomainRequest:
@@ -34,6 +81,8 @@ async def create_domain(
             raise DomainVerificationError(f"Domain {payload.domain} is pending")
     except DomainVerificationError as e:
         raise HTTPException(status_code=202, detail=str(e))
+    except (CircuitOpenError, CircuitTimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -42,16 +91,39 @@ async def create_domain(
         status=result.status
     )
 
+@router.post(
+    "/domain/batch",
+    response_model=CreateDomainsResponse,
+    summary="Provisions many domains at once, reporting the status of each"
+)
+def create_domains(
+    payload: CreateDomainsRequest,
+    domain_service: IDomainService = Depends(get_domain_service)
+) -> CreateDomainsResponse:
+    try:
+        results = domain_service.register_domains(payload.domains)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CreateDomainsResponse(
+        domains=[DomainStatus(**result.model_dump()) for result in results],
+        pending=sum(1 for result in results if result.status == "pending"),
+        verified=sum(1 for result in results if result.status == "verified"),
+        failed=sum(1 for result in results if result.status == "failed")
+    )
+
 @router.delete(
     "/domain/{domain}",
     summary="Deletes a domain"
 )
-async def delete_domain(
+def delete_domain(
     domain: str,
     domain_service: IDomainService = Depends(get_domain_service)
 ) -> bool:
     try:
         result = domain_service.delete_domain(domain)
+    except (CircuitOpenError, CircuitTimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -62,7 +134,7 @@ async def delete_domain(
     response_model=CreateInboxResponse,
     summary="Creates an inbox on the given domain. Assumes the domain has been setup and verified"
 )
-async def create_inbox(
+def create_inbox(
     payload: CreateInboxRequest,
     request: Request,
     inbox_service: IInboxService = Depends(get_inbox_service)
@@ -72,6 +144,8 @@ async def create_inbox(
         get_email_service(request, result.id)
     except DomainVerificationError as e:
         raise HTTPException(status_code=202, detail=str(e))
+    except (CircuitOpenError, CircuitTimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -80,21 +154,76 @@ async def create_inbox(
         message=result.message
     )
 
+@router.post(
+    "/inboxes/batch",
+    response_model=CreateInboxesResponse,
+    summary="Creates many inboxes at once, reporting the result of each"
+)
+def create_inboxes(
+    payload: CreateInboxesRequest,
+    inbox_service: IInboxService = Depends(get_inbox_service)
+) -> CreateInboxesResponse:
+    try:
+        results = inbox_service.create_inboxes(payload.emails)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Email services are built on first use rather than for every new inbox here
+    return CreateInboxesResponse(
+        inboxes=[InboxStatus(**result.model_dump()) for result in results],
+        created=sum(1 for result in results if result.status == "created"),
+        failed=sum(1 for result in results if result.status == "failed")
+    )
+
+@router.post(
+    "/inboxes/batch/delete",
+    response_model=DeleteInboxesResponse,
+    summary="Deletes many inboxes at once along with their stored mail, reporting the result of each"
+)
+def delete_inboxes(
+    payload: DeleteInboxesRequest,
+    inbox_service: IInboxService = Depends(get_inbox_service)
+) -> DeleteInboxesResponse:
+    try:
+        results = inbox_service.delete_inboxes(payload.inbox_ids)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return DeleteInboxesResponse(
+        inboxes=[DeletedInboxStatus(**result.model_dump()) for result in results],
+        deleted=sum(1 for result in results if result.status == "deleted"),
+        failed=sum(1 for result in results if result.status == "failed")
+    )
+
 @router.get(
     "/inboxes",
-    summary="Lists all the inboxes",
+    summary="Lists the inboxes, optionally only those on a domain (pagination: cursor, limit)",
     response_model=ListInboxesResponse
 )
 async def list_inboxes(
+    request: Request,
+    response: Response,
+    domain: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     inbox_service: IInboxService = Depends(get_inbox_service)
-) -> ListInboxesResponse:
+):
+    # Read before listing, a change made meanwhile only makes the ETag stale
+    etag = make_etag(inbox_service.get_version())
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    try:
+        after = int(decode_cursor(cursor)) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    page = inbox_service.list_inboxes(domain, after=after, limit=limit)
+    
     return ListInboxesResponse(
-        inboxes=[
-            InboxRecord(
-                inbox_id=inbox.inbox_id,
-                email=inbox.email
-            ) for inbox in inbox_service.list_inboxes()
-        ]
+        inboxes=page.inboxes,
+        next_cursor=encode_cursor(str(page.next_position)) if page.next_position is not None else None
     )
 
 @router.get(
@@ -108,9 +237,9 @@ async def get_inbox(
 
 @router.delete(
     "/inboxes/{inbox_id}",
-    summary="Deletes an inbox"
+    summary="Deletes an inbox and its stored mail"
 )
-async def delete_inbox(
+def delete_inbox(
     inbox_id: str,
     inbox_service: IInboxService = Depends(get_inbox_service)
 ):
@@ -120,17 +249,35 @@ async def delete_inbox(
 
 @router.post(
     "/inboxes/{inbox_id}/emails",
-    summary="Sends an email from this inbox"
+    summary="Queues an email to be sent from this inbox",
+    response_model=SendEmailResponse,
+    status_code=202
 )
 async def send_email(
     payload: SendEmailRequest,
     inbox_id: str,
     request: Request
-):
+) -> SendEmailResponse:
     email_service = get_email_service(request, inbox_id)
     
     try:
-        email_service.send_email(
+        if payload.send_at and payload.send_at.timestamp() > time.time():
+            scheduled = get_email_scheduler(request).schedule(
+                inbox_id=inbox_id,
+                to_email=payload.to_email,
+                subject=payload.subject,
+                body=payload.body,
+                send_at=payload.send_at
+            )
+            
+            return SendEmailResponse(
+                message_id=scheduled.schedule_id,
+                status="scheduled",
+                message="Email scheduled",
+                send_at=scheduled.send_at
+            )
+        
+        result = email_service.send_email(
             to_email=payload.to_email,
             subject=payload.subject,
             body=payload.body
@@ -138,34 +285,153 @@ async def send_email(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    return {"message": "Email sent"}
+    return SendEmailResponse(
+        message_id=result.message_id,
+        status=result.status,
+        message="Email queued"
+    )
+
+@router.post(
+    "/inboxes/{inbox_id}/emails/batch",
+    summary="Queues the same email to many recipients from this inbox",
+    response_model=SendBatchEmailResponse,
+    status_code=202
+)
+async def send_batch_email(
+    payload: SendBatchEmailRequest,
+    inbox_id: str,
+    request: Request
+) -> SendBatchEmailResponse:
+    email_service = get_email_service(request, inbox_id)
+    
+    try:
+        results = email_service.send_batch(
+            to_emails=list(dict.fromkeys(payload.to_emails)),
+            subject=payload.subject,
+            body=payload.body
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return SendBatchEmailResponse(
+        message_ids=[result.message_id for result in results],
+        recipients=len(set(payload.to_emails)),
+        message="Emails queued"
+    )
+
+@router.get(
+    "/inboxes/{inbox_id}/outbound/{message_id}",
+    summary="Get the delivery status of a queued email",
+    response_model=OutboundEmailStatusResponse
+)
+async def get_outbound_email(
+    inbox_id: str,
+    message_id: str,
+    request: Request
+) -> OutboundEmailStatusResponse:
+    email_service = get_email_service(request, inbox_id)
+    
+    result = email_service.get_outbound_email(message_id)
+    
+    if result is None:
+        scheduled = get_email_scheduler(request).get_scheduled(message_id)
+        
+        if scheduled is None or scheduled.inbox_id != inbox_id:
+            raise HTTPException(status_code=404, detail=f"No outbound email {message_id}")
+        
+        return OutboundEmailStatusResponse(
+            message_id=scheduled.schedule_id,
+            status="scheduled",
+            attempts=0,
+            created_at=scheduled.created_at,
+            updated_at=scheduled.created_at
+        )
+    
+    return OutboundEmailStatusResponse(
+        message_id=result.message_id,
+        status=result.status,
+        attempts=result.attempts,
+        provider_message_id=result.provider_message_id,
+        last_error=result.last_error,
+        created_at=result.created_at,
+        updated_at=result.updated_at
+    )
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def to_email_record(email: StoredEmail) -> EmailRecord:
+    return EmailRecord(
+        message_id=email.message_id,
+        sender=email.from_email,
+        recipient=email.to_email,
+        subject=email.subject,
+        body=email.body,
+        metadata=EmailRecordMetadata(
+            opened=False,
+            thread_id=email.thread_id
+        ),
+        timestamp=email.timestamp
+    )
+
+def stream_email_records(emails: Iterator[StoredEmail], limit: Optional[int]) -> Iterator[str]:
+    for count, email in enumerate(emails):
+        if limit is not None and count >= limit:
+            return
+        yield to_email_record(email).model_dump_json() + "\n"
 
 @router.get(
     "/inboxes/{inbox_id}/emails",
-    summary="List emails in inbox (filters: unread, since, from, to, thread_id, pagination)"
+    summary="List emails in inbox (filters: unread, since, from, to, thread_id, pagination). Streams NDJSON with stream=true or Accept: application/x-ndjson",
+    response_model=GetInboxResponse
 )
 async def list_emails(
     inbox_id: str,
-    request: Request
+    request: Request,
+    response: Response,
+    unread: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    from_email: Optional[str] = Query(None, alias="from"),
+    to_email: Optional[str] = Query(None, alias="to"),
+    thread_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size, defaults to 50. Streams are unlimited unless set"),
+    stream: bool = False
 ):
     email_service = get_email_service(request, inbox_id)
+    streaming = stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
     
-    emails = email_service.get_emails()
+    # Read before listing, a change made meanwhile only makes the ETag stale
+    etag = make_etag(email_service.get_version(), "-ndjson" if streaming else "")
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    try:
+        after = int(decode_cursor(cursor)) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    query = EmailQuery(
+        since=since,
+        from_email=from_email,
+        to_email=to_email,
+        thread_id=thread_id,
+        unread=unread
+    )
+    
+    # One email per line, read from storage as the client consumes the response
+    if streaming:
+        return StreamingResponse(
+            stream_email_records(email_service.iter_emails(query, after=after), limit),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"ETag": etag}
+        )
+    
+    page = email_service.list_emails(query, after=after, limit=limit or 50)
+    response.headers["ETag"] = etag
     
     return GetInboxResponse(
-        emails=[
-            EmailRecord(
-                sender=email.from_email,
-                recipient=email.to_email,
-                subject=email.subject,
-                body=email.body,
-                metadata=EmailRecordMetadata(
-                    opened=False,
-                    thread_id="-1"
-                ),
-                timestamp=email.message_time
-            ) for email in emails
-        ]
+        emails=[to_email_record(email) for email in page.emails],
+        next_cursor=encode_cursor(str(page.next_position)) if page.next_position is not None else None
     )
 
 @router.get(
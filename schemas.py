@@ -8,35 +8,115 @@ from common_types import InboxRecord
 class CreateDomainRequest(BaseModel):
     domain: str
 
+class CreateDomainsRequest(BaseModel):
+    domains: List[str] = Field(min_length=1, max_length=1000)
+
 class CreateInboxRequest(BaseModel):
     email: EmailStr
 
+class CreateInboxesRequest(BaseModel):
+    emails: List[EmailStr] = Field(min_length=1, max_length=1000)
+
+class DeleteInboxesRequest(BaseModel):
+    inbox_ids: List[str] = Field(min_length=1, max_length=1000)
+
 
 class SendEmailRequest(BaseModel):
     to_email: EmailStr
     subject: str
     body: str
+    send_at: Optional[datetime] = None # Send later instead of now
+
+class SendBatchEmailRequest(BaseModel):
+    to_emails: List[EmailStr] = Field(min_length=1)
+    subject: str
+    body: str
 
 # --------- RESPONSES --------
 class CreateDomainResponse(BaseModel):
     domain: str
     status: Literal["pending", "verified"]
 
+class DomainStatus(BaseModel):
+    domain: str
+    status: Literal["pending", "verified", "failed"]
+    error: Optional[str] = None
+
+class CreateDomainsResponse(BaseModel):
+    domains: List[DomainStatus]
+    pending: int
+    verified: int
+    failed: int
+
 class CreateInboxResponse(BaseModel):
     id: str
     message: str
 
+class InboxStatus(BaseModel):
+    email: str
+    id: Optional[str] = None
+    status: Literal["created", "exists", "failed"]
+    error: Optional[str] = None
+
+class CreateInboxesResponse(BaseModel):
+    inboxes: List[InboxStatus]
+    created: int
+    failed: int
+
+class DeletedInboxStatus(BaseModel):
+    inbox_id: str
+    email: Optional[str] = None
+    status: Literal["deleted", "not_found", "failed"]
+    error: Optional[str] = None
+
+class DeleteInboxesResponse(BaseModel):
+    inboxes: List[DeletedInboxStatus]
+    deleted: int
+    failed: int
+
 
 class CreateInboxSessionResponse(BaseModel):
     session_token: str
     expires_at: datetime
     message: str
 
+SEND_STATUS = Literal["scheduled", "pending", "sending", "sent", "failed", "unknown"]
+
+class SendEmailResponse(BaseModel):
+    message_id: str
+    status: SEND_STATUS
+    message: str
+    send_at: Optional[datetime] = None
+
+class SendBatchEmailResponse(BaseModel):
+    message_ids: List[str] # One handle per provider batch
+    recipients: int
+    message: str
+
+class OutboundEmailStatusResponse(BaseModel):
+    message_id: str
+    status: SEND_STATUS
+    attempts: int
+    provider_message_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class ProviderStatus(BaseModel):
+    name: str
+    state: Literal["closed", "open", "half_open"]
+    consecutive_failures: int
+    retry_after: float
+
+class ProviderStatusResponse(BaseModel):
+    providers: List[ProviderStatus]
+
 class EmailRecordMetadata(BaseModel):
     opened: bool
     thread_id: str
 
 class EmailRecord(BaseModel):
+    message_id: str
     sender: EmailStr
     recipient: EmailStr
     subject: str
@@ -46,6 +126,8 @@ class EmailRecord(BaseModel):
 
 class GetInboxResponse(BaseModel):
     emails: List[EmailRecord]
+    next_cursor: Optional[str] = None # Pass back as cursor for the next page
 
 class ListInboxesResponse(BaseModel):
     inboxes: List[InboxRecord]
+    next_cursor: Optional[str] = None # Pass back as cursor for the next page
@@ -1,6 +1,15 @@
 from .inbox_service import IInboxService, build_inbox_service
 from .domain_service import IDomainService, build_domain_service
-from .email_service import EmailServiceProvider, IEmailService
+from .email_service import (
+    EmailServiceProvider,
+    IEmailService,
+    SendQueue,
+    DomainRateLimiter,
+    build_send_queue,
+    build_rate_limiter,
+    EmailScheduler,
+    build_email_scheduler
+)
 
 __all__ = [
     "IInboxService",
@@ -8,5 +17,11 @@ __all__ = [
     "build_inbox_service",
     "build_domain_service",
     "EmailServiceProvider",
-    "IEmailService"
+    "IEmailService",
+    "SendQueue",
+    "DomainRateLimiter",
+    "build_send_queue",
+    "build_rate_limiter",
+    "EmailScheduler",
+    "build_email_scheduler"
 ]
\ No newline at end of file
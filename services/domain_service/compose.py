@@ -1,11 +1,31 @@
-from adapters import EmailDeliveryPort, DnsPort
+from typing import Optional
+
+from adapters import EmailDeliveryPort, DnsPort, DnsResolverPort
+from storage import DomainVerificationStorage, DomainStorage
 from .domain_service import DomainService, IDomainService
 
 def build_domain_service(
     email_delivery: EmailDeliveryPort,
-    dns: DnsPort
+    dns: DnsPort,
+    domain_storage: DomainStorage,
+    verification_storage: Optional[DomainVerificationStorage] = None,
+    dns_resolver: Optional[DnsResolverPort] = None,
+    verify_concurrency: int = 16,
+    verify_timeout: float = 30,
+    provision_concurrency: int = 8,
+    reconcile_interval: float = 900
 ) -> IDomainService:
-    return DomainService(
+    domain_service = DomainService(
         email_delivery,
-        dns
-    )
\ No newline at end of file
+        dns,
+        domain_storage,
+        verification_storage=verification_storage,
+        dns_resolver=dns_resolver,
+        verify_concurrency=verify_concurrency,
+        verify_timeout=verify_timeout,
+        provision_concurrency=provision_concurrency,
+        reconcile_interval=reconcile_interval
+    )
+    domain_service.start()
+    
+    return domain_service
\ No newline at end of file
@@ -1,12 +1,19 @@
 import datetime
+import heapq
 import threading
 import time
 
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pydantic import BaseModel, Field
-from typing import Dict, Callable, Optional, List, Literal
+from typing import Dict, Callable, Optional, List, Literal, Tuple
 from enum import Enum
 
-from adapters import EmailDeliveryPort
+from adapters import EmailDeliveryPort, DnsResolverPort
+from adapters.dns.dns_resolver import normalize_record_value
+from common_types import DNSRecord
+from util.domain_utils import split_domain
+from storage import DomainVerificationStorage, DomainVerificationSchema
 
 import logging
 logger = logging.getLogger(__name__)
@@ -16,6 +23,7 @@ class VerificationStatus(Enum):
     VERIFIED = "verified"
     FAILED = "failed"
     EXPIRED = "expired"
+    REMOVED = "removed"
     
 
 class PendingDomain(BaseModel):
@@ -28,6 +36,7 @@ class PendingDomain(BaseModel):
     error_function: Optional[Callable[[str, str], None]] = None
     status: VerificationStatus = VerificationStatus.PENDING
     last_error: Optional[str] = None
+    expected_records: List[DNSRecord] = Field(default_factory=list)
 
     class Config:
         arbitrary_types_allowed = True
@@ -51,175 +60,437 @@ class PendingDomain(BaseModel):
         # Exponential backoff: base_delay * (1.5 ^ (attempts - 1))
         delay = min(base_delay * (1.5 ** (self.attempts - 1)), max_delay)
         return int(delay)
+    
+    def to_record(self, status: Optional[VerificationStatus] = None) -> DomainVerificationSchema:
+        return DomainVerificationSchema(
+            domain=self.domain,
+            status=VerificationStatus(status or self.status).value,
+            attempts=self.attempts,
+            last_error=self.last_error,
+            created_at=self.created_at,
+            last_attempt=self.last_attempt,
+            updated_at=datetime.datetime.now()
+        )
 
 class DnsVerifier:
+    """
+    Polls the email delivery service until pending domains are verified.
+
+    Pending domains are kept in a heap ordered by their next attempt, which backs off
+    with `PendingDomain.get_next_delay`. A single thread sleeps until the earliest one is
+    due, so each wakeup only touches the domains that are actually due.
+
+    Due domains are verified concurrently, at most `max_concurrency` at a time, and a call
+    that takes longer than `verify_timeout` seconds counts as a failed attempt. Such a call
+    cannot be interrupted, until it returns its domain is skipped and its worker gets no new
+    work. Skipped domains count as a failed attempt too.
+
+    Every status change is persisted so pending checks resume after a restart, attempts in
+    between are not, which keeps the table at a few rows per domain. Finished domains
+    leave `pending_domains` for a compact status index, which keeps at most `max_finished`
+    domains for at most `finished_retention`.
+
+    With a `resolver`, an attempt first checks the domain's expected records are published
+    and only asks the provider to verify once they are, which skips the slow, rate limited
+    provider calls while DNS is still propagating. The expected records are not persisted,
+    `get_expected_records` looks them up again for the domains resumed after a restart.
+
+    `on_finished` is called with the domain and its final status for every finished domain,
+    including those resumed after a restart, whose per domain callbacks are lost.
+    """
     def __init__(
         self,
         email_delivery: EmailDeliveryPort,
-        check_interval: int = 10
+        verification_storage: Optional[DomainVerificationStorage] = None,
+        resolver: Optional[DnsResolverPort] = None,
+        on_finished: Optional[Callable[[str, str], None]] = None,
+        get_expected_records: Optional[Callable[[str], List[DNSRecord]]] = None,
+        max_concurrency: int = 16,
+        verify_timeout: float = 30,
+        max_finished: int = 10_000,
+        finished_retention: datetime.timedelta = datetime.timedelta(days=7)
     ):
         self.email_delivery = email_delivery
-        self.check_interval = check_interval
+        self.verification_storage = verification_storage
+        self.resolver = resolver
+        self.on_finished = on_finished
+        self.get_expected_records = get_expected_records
+        self.max_concurrency = max_concurrency
+        self.verify_timeout = verify_timeout
+        self.max_finished = max_finished
+        self.finished_retention = finished_retention
     
         self.pending_domains: Dict[str, PendingDomain] = {}
-        self._verification_timer: Optional[threading.Timer] = None
+        # domain -> (status, finished_at), oldest first
+        self.finished_domains: "OrderedDict[str, Tuple[str, datetime.datetime]]" = OrderedDict()
+        self._heap: List[Tuple[float, str]] = []
+        self._next_due: Dict[str, float] = {} # domain -> due time of its live heap entry
         self._timer_lock = threading.Lock()
+        self._condition = threading.Condition(self._timer_lock)
         self._shutdown = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Timed out calls that were already running, each holds a worker until it returns
+        self._abandoned: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="dns-verify"
+        )
+    
+    def start(self):
+        """Resume the verifications persisted before the last shutdown"""
+        if self.verification_storage is None:
+            return
+        
+        now = datetime.datetime.now()
+        latest = self.verification_storage.get_latest_verifications()
+        
+        finished = []
+        with self._timer_lock:
+            for record in latest.values():
+                if record.status == VerificationStatus.PENDING.value:
+                    pending_domain = PendingDomain(
+                        domain=record.domain,
+                        created_at=record.created_at,
+                        # Restart the expiry clock, the time we were down must not count against the domain
+                        last_attempt=now,
+                        attempts=record.attempts,
+                        last_error=record.last_error,
+                        expected_records=self._load_expected_records(record.domain)
+                    )
+                    self.pending_domains[record.domain] = pending_domain
+                    self._schedule(pending_domain)
+                elif record.status != VerificationStatus.REMOVED.value and now - record.updated_at < self.finished_retention:
+                    finished.append(record)
+            
+            for record in sorted(finished, key=lambda record: record.updated_at):
+                self.finished_domains[record.domain] = (record.status, record.updated_at)
+            self._evict_finished(now)
+            
+            if self.pending_domains:
+                self._ensure_worker_running()
+        
+        logger.info(f"Resumed {len(self.pending_domains)} pending and {len(self.finished_domains)} finished domain verifications")
+    
+    def _load_expected_records(self, domain: str) -> List[DNSRecord]:
+        if self.get_expected_records is None:
+            return []
+        
+        try:
+            return self.get_expected_records(domain)
+        except Exception as e:
+            # Without them the DNS pre-check is skipped, the provider still decides
+            logger.warning(f"Could not load expected DNS records for domain={domain}: {e}")
+            return []
     
     def get_domain_status(self, domain: str) -> Optional[Literal["verified", "pending"]]:
-        if domain in self.pending_domains:
-            status = self.pending_domains[domain].status
-            return "verified" if status == VerificationStatus.VERIFIED else "pending"
+        """
+        None for unknown domains and those that failed or expired, so they are verified again
+        """
+        with self._timer_lock:
+            if domain in self.pending_domains:
+                return "pending"
+            if domain in self.finished_domains:
+                status, _ = self.finished_domains[domain]
+                if status == VerificationStatus.VERIFIED.value:
+                    return "verified"
         return None
     
     def add_pending_dns_verification(
         self, 
         domain: str, 
         completion_function: Optional[Callable[[str], None]] = None,
-        error_function: Optional[Callable[[str, str], None]] = None
+        error_function: Optional[Callable[[str, str], None]] = None,
+        expected_records: Optional[List[DNSRecord]] = None
     ) -> bool:
         with self._timer_lock:
             # Check if domain already exists
-            if domain in self.pending_domains:
-                existing = self.pending_domains[domain]
+            if domain in self.finished_domains:
+                status, _ = self.finished_domains[domain]
                 
-                if existing.status in [VerificationStatus.VERIFIED, VerificationStatus.FAILED]:
-                    logger.warning(f"Domain {domain} already processed with status {existing.status}")
+                if status == VerificationStatus.VERIFIED.value:
+                    logger.warning(f"Domain {domain} already processed with status {status}")
                     return False
                 
+                # Failed and expired domains are verified again
+                del self.finished_domains[domain]
+            
+            if domain in self.pending_domains:
+                existing = self.pending_domains[domain]
+                
                 # Update callbacks for existing pending domain
                 if completion_function:
                     existing.completion_function = completion_function
                 if error_function:
                     existing.error_function = error_function
+                if expected_records:
+                    existing.expected_records = expected_records
                 return True
             
             # Add new domain
-            self.pending_domains[domain] = PendingDomain(
+            pending_domain = PendingDomain(
                 domain=domain,
                 completion_function=completion_function,
                 error_function=error_function,
+                expected_records=expected_records or [],
             )
+            self.pending_domains[domain] = pending_domain
+            self._schedule(pending_domain)
             
             logger.info(f"Added domain {domain} for DNS verification")
             
-            # Start time if this is the first domain
-            self._ensure_verification_timer_running()
+            # Start the worker if this is the first domain
+            self._ensure_worker_running()
+        
+        self._persist([pending_domain.to_record()])
         
         return True
     
     def remove_domain(self, domain: str) -> bool:
         """Remove a domain from verification (eg. if user cancels)"""
         with self._timer_lock:
-            if domain in self.pending_domains:
-                del self.pending_domains[domain]
-                logger.info(f"Removed domain {domain} from verification")
-                return True
-            return False
-    
-    def _ensure_verification_timer_running(self):
-        """Ensure the verification timer is running"""
-        if self._verification_timer is None or not self._verification_timer.is_alive():
-            self._start_verification_timer()
+            self.finished_domains.pop(domain, None)
+            
+            pending_domain = self.pending_domains.pop(domain, None)
+            if pending_domain is None:
+                return False
             
-    def _start_verification_timer(self):
-        """Start the verification timer"""
+            # Its heap entry is skipped when popped
+            self._next_due.pop(domain, None)
+        
+        self._persist([pending_domain.to_record(VerificationStatus.REMOVED)])
+        logger.info(f"Removed domain {domain} from verification")
+        return True
+    
+    def _schedule(self, pending_domain: PendingDomain):
+        """Push the domain's next attempt onto the heap, expects the lock to be held"""
+        due = pending_domain.last_attempt.timestamp() + pending_domain.get_next_delay()
+        
+        self._next_due[pending_domain.domain] = due
+        heapq.heappush(self._heap, (due, pending_domain.domain))
+        
+        # Only wake the worker if this is now the earliest domain
+        if self._heap[0] == (due, pending_domain.domain):
+            self._condition.notify()
+    
+    def _ensure_worker_running(self):
+        """Ensure the verification thread is running, expects the lock to be held"""
         if self._shutdown.is_set():
             return
         
-        self._verification_timer = threading.Timer(
-            self.check_interval,
-            self._verification_cycle
-        )
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run,
+                name="dns-verifier",
+                daemon=True
+            )
+            self._thread.start()
+            logger.info("Started DNS verification thread")
+    
+    def _run(self):
+        while not self._shutdown.is_set():
+            try:
+                due = self._wait_for_due()
+                if due:
+                    self._verify_domains(due)
+            except Exception as e:
+                logger.error(f"Error in verification cycle: {e}", exc_info=True)
+    
+    def _wait_for_due(self) -> List[PendingDomain]:
+        """Sleep until the earliest domain is due, then pop every due domain"""
+        with self._condition:
+            while not self._shutdown.is_set():
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                
+                due = []
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    due_at, domain = heapq.heappop(self._heap)
+                    
+                    # Skip entries of removed or rescheduled domains
+                    if self._next_due.get(domain) != due_at:
+                        continue
+                    del self._next_due[domain]
+                    
+                    due.append(self.pending_domains[domain])
+                
+                return due
         
-        self._verification_timer.daemon = True
-        self._verification_timer.start()
-        logger.info(f"Started DNS verification timer (interval={self.check_interval}s)")
+        return []
     
-    def _verification_cycle(self):
-        """Main verification cycle - runs periodically"""
-        try:
-            self._verify_domains()
+    def _verify_domains(self, domains: List[PendingDomain]):
+        """Verify the due domains, as many at a time as there are free workers"""
+        logger.info(f"Verifying {len(domains)} domains at {datetime.datetime.now()}")
+        
+        i = 0
+        while i < len(domains):
+            if self._shutdown.is_set():
+                return
             
-            # Schedule next cycle if we still have pending domains
-            with self._timer_lock:
-                pending_count = len([
-                    p for p in self.pending_domains.values()
-                    if p.status == VerificationStatus.PENDING
-                ])
-                
-                if pending_count > 0 and not self._shutdown.is_set():
-                    self._start_verification_timer()
-                else:
-                    self._verification_timer = None
-                    logger.info("Stopped DNS verification timer (no pending domains)")
-        except Exception as e:
-            logger.error(f"Error in verification cycle: {e}", exc_info=True)
-            # Restart timer even on error
-            if not self._shutdown.is_set():
-                self._start_verification_timer()
+            free = self._free_workers()
+            # Without a free worker the remaining domains are all skipped this round
+            size = free if free > 0 else len(domains) - i
+            self._verify_chunk(domains[i:i + size], free)
+            i += size
+    
+    def _free_workers(self) -> int:
+        """Workers not held by abandoned calls, only called from the verification thread"""
+        for domain, future in list(self._abandoned.items()):
+            if future.done():
+                del self._abandoned[domain]
+        
+        return max(self.max_concurrency - len(self._abandoned), 0)
     
-    def _verify_domains(self):
-        """Verify all pending domains"""
+    def _verify_chunk(self, domains: List[PendingDomain], free: int):
         now = datetime.datetime.now()
-        logger.info(f"Verifying domains at {now}")
-        domains_to_process = []
         
-        # Collect domains that need processing
-        with self._timer_lock:
-            for domain, pending_domain in self.pending_domains.items():
-                if not pending_domain.should_retry():
-                    continue
-                
-                # Check if enough time has passed since last attempt
-                time_since_last = (now - pending_domain.last_attempt).total_seconds()
-                required_delay = pending_domain.get_next_delay()
-                
-                if time_since_last >= required_delay:
-                    domains_to_process.append(domain)
+        # domain -> error, None once verified
+        results: Dict[str, Optional[str]] = {}
+        futures: Dict[str, Future] = {}
+        for pending_domain in domains:
+            domain = pending_domain.domain
+            if not pending_domain.should_retry():
+                continue
+            
+            if domain in self._abandoned:
+                results[domain] = "Previous verification is still running"
+            elif len(futures) >= free:
+                results[domain] = f"No free verification worker, {len(self._abandoned)} timed out calls still running"
+            else:
+                futures[domain] = self._executor.submit(self._verify, pending_domain)
         
-        # Process domains (outside lock to avoid blocking)
-        completed_domains = []
-        failed_domains = []
+        wait(futures.values(), timeout=self.verify_timeout)
         
-        for domain in domains_to_process:
-            pending_domain = self.pending_domains.get(domain)
-            if not pending_domain:
+        for domain, future in futures.items():
+            if not future.done():
+                if not future.cancel():
+                    self._abandoned[domain] = future
+                results[domain] = f"Verification timed out after {self.verify_timeout}s"
                 continue
             
             try:
-                pending_domain.last_attempt = now
-                pending_domain.attempts += 1
+                results[domain] = future.result()
+            except Exception as e:
+                logger.error(f"Error verifying domain {domain}: {e}")
+                results[domain] = str(e)
+        
+        completed_domains: List[PendingDomain] = []
+        failed_domains: List[PendingDomain] = []
+        records: List[DomainVerificationSchema] = []
+        
+        # Apply every result at once so readers never see a half updated chunk
+        with self._timer_lock:
+            for pending_domain in domains:
+                domain = pending_domain.domain
                 
-                logger.debug(f"Verifying domain {domain} (attempt {pending_domain.attempts})")
+                # Skip domains removed while being verified
+                if self.pending_domains.get(domain) is not pending_domain:
+                    continue
                 
-                if self._verify_dns_domain(domain):
+                if domain not in results:
+                    failed_domains.append(pending_domain)
+                    self._finish(pending_domain, now)
+                elif results[domain] is None:
+                    pending_domain.last_attempt = now
+                    pending_domain.attempts += 1
                     pending_domain.status = VerificationStatus.VERIFIED
-                    completed_domains.append(domain)
+                    completed_domains.append(pending_domain)
+                    self._finish(pending_domain, now)
                     logger.info(f"Domain {domain} verified successfully")
                 else:
-                    pending_domain.last_error = "Domain verification failed"
-                    if not pending_domain.should_retry():
-                        failed_domains.append(domain)
-                        logger.warning(f"Domain {domain} verification failed permanently")
-            
-            except Exception as e:
-                pending_domain.last_error = str(e)
-                logger.error(f"Error verifying domain {domain}: {e}")
+                    pending_domain.last_attempt = now
+                    pending_domain.attempts += 1
+                    pending_domain.last_error = results[domain]
+                    logger.debug(f"Domain {domain} not verified (attempt {pending_domain.attempts}): {results[domain]}")
+                    self._schedule(pending_domain)
+                    # Still pending, nothing a restart needs
+                    continue
                 
-                if not pending_domain.should_retry():
-                    failed_domains.append(domain)
+                records.append(pending_domain.to_record())
+        
+        self._persist(records)
         
         # Handle completed and failed domains
         self._handle_completed_domains(completed_domains)
         self._handle_failed_domains(failed_domains)
         
-    def _handle_completed_domains(self, domains: List[str]):
+        if self.on_finished:
+            for pending_domain in completed_domains + failed_domains:
+                try:
+                    self.on_finished(pending_domain.domain, VerificationStatus(pending_domain.status).value)
+                except Exception as e:
+                    logger.error(f"Error in on_finished for {pending_domain.domain}: {e}")
+    
+    def _verify(self, pending_domain: PendingDomain) -> Optional[str]:
+        """Verify a single domain, returns the error or None once verified"""
+        missing = self._missing_records(pending_domain)
+        if missing:
+            return f"{len(missing)}/{len(pending_domain.expected_records)} DNS records not visible yet"
+        
+        if self.email_delivery.verify_domain(pending_domain.domain):
+            return None
+        return "Domain verification failed"
+    
+    def _missing_records(self, pending_domain: PendingDomain) -> List[DNSRecord]:
+        """The expected records the resolver cannot see yet, empty if there is no resolver"""
+        if self.resolver is None or not pending_domain.expected_records:
+            return []
+        
+        _, apex = split_domain(pending_domain.domain)
+        
+        missing = []
+        for record in pending_domain.expected_records:
+            # Record names are either fully qualified or relative to the apex
+            name = record.name if record.name.endswith(apex) else f"{record.name}.{apex}"
+            try:
+                values = self.resolver.resolve(name, record.record_type)
+            except Exception as e:
+                # A broken resolver must not block verification, let the provider decide
+                logger.warning(f"DNS pre-check failed for {name} ({record.record_type}): {e}")
+                return []
+            
+            if normalize_record_value(record.record_type, record.value) not in values:
+                missing.append(record)
+        
+        return missing
+    
+    def _finish(self, pending_domain: PendingDomain, now: datetime.datetime):
+        """Move a domain into the finished index, expects the lock to be held"""
+        del self.pending_domains[pending_domain.domain]
+        self._next_due.pop(pending_domain.domain, None)
+        
+        self.finished_domains[pending_domain.domain] = (VerificationStatus(pending_domain.status).value, now)
+        self.finished_domains.move_to_end(pending_domain.domain)
+        self._evict_finished(now)
+    
+    def _evict_finished(self, now: datetime.datetime):
+        """Drop the oldest finished domains past the retention limits, expects the lock to be held"""
+        while self.finished_domains:
+            domain, (_, finished_at) = next(iter(self.finished_domains.items()))
+            if len(self.finished_domains) <= self.max_finished and now - finished_at < self.finished_retention:
+                break
+            del self.finished_domains[domain]
+    
+    def _persist(self, records: List[DomainVerificationSchema]):
+        if self.verification_storage is None or not records:
+            return
+        
+        try:
+            self.verification_storage.save_verifications(records)
+        except Exception as e:
+            # Losing a row only costs extra attempts after a restart
+            logger.error(f"Failed to persist {len(records)} domain verifications: {e}")
+        
+    def _handle_completed_domains(self, domains: List[PendingDomain]):
         """Handle successfully verified domains"""
-        for domain in domains:
-            pending_domain = self.pending_domains.get(domain)
-            if not pending_domain:
-                continue
+        for pending_domain in domains:
+            domain = pending_domain.domain
             
             # Call completion function
             if pending_domain.completion_function:
@@ -230,12 +501,10 @@ class DnsVerifier:
                 except Exception as e:
                     logger.error(f"Error in completion function for {domain}: {e}")
 
-    def _handle_failed_domains(self, domains: List[str]):
+    def _handle_failed_domains(self, domains: List[PendingDomain]):
         """Handle failed/expired domains"""
-        for domain in domains:
-            pending_domain = self.pending_domains.get(domain)
-            if not pending_domain:
-                continue
+        for pending_domain in domains:
+            domain = pending_domain.domain
             
             if pending_domain.status == VerificationStatus.EXPIRED:
                 error_msg = f"Domain verification expired for {domain}"
@@ -254,31 +523,26 @@ class DnsVerifier:
             
             logger.warning(error_msg)
     
-    def _verify_dns_domain(self, domain: str) -> bool:
-        """Verify a single domain"""
-        try:
-            return self.email_delivery.verify_domain(domain)
-        except Exception as e:
-            logger.error(f"Exception during domain verification for {domain}: {e}")
-            return False
-        
     def shutdown(self, timeout: int = 30):
         """Gracefully shutdown the verifier"""
         logger.info("Shutting down DNS verifier...")
         self._shutdown.set()
         
-        with self._timer_lock:
-            if self._verification_timer and self._verification_timer.is_alive():
-                self._verification_timer.cancel()
+        with self._condition:
+            self._condition.notify_all()
         
         # Wait for any ongoing verification to complete
-        time.sleep(min(timeout, 5))
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        
+        self._executor.shutdown(wait=False, cancel_futures=True)
         
         # Call error functions for remaining pending domains
-        for domain, pending in self.pending_domains.items():
+        for domain, pending in list(self.pending_domains.items()):
             if pending.status == VerificationStatus.PENDING and pending.error_function:
                 try:
-                    pending.error_function("DNS verifier shutting down")
+                    pending.error_function(domain, "DNS verifier shutting down")
                 except Exception as e:
                     logger.error(f"Error calling error function during shutdown for {domain}: {e}")
         
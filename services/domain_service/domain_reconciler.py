@@ -0,0 +1,202 @@
+import datetime
+import json
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Set, Tuple
+
+from adapters import EmailDeliveryPort, DnsPort
+from adapters.dns.dns_resolver import normalize_record_value
+from common_types import DNSRecord
+from storage import DomainStorage
+from util.domain_utils import split_domain
+
+import logging
+logger = logging.getLogger(__name__)
+
+class ReconcileResult(BaseModel):
+    domain: str
+    records_created: int = 0
+    records_deleted: int = 0
+    routes_created: int = 0
+    routes_deleted: int = 0
+    error: Optional[str] = None
+
+
+class DomainReconciler:
+    """
+    Brings the DNS records and inbound routes of our domains in line with what they should be.
+
+    The desired records are asked from the email delivery provider on every run, so a rotated
+    DKIM key replaces the old one, and the registry's copy is refreshed when they changed. Only the differences are applied, so reconciling a
+    domain twice changes nothing the second time. Runs when a domain is registered and every
+    `interval` seconds for every pending or verified domain.
+    """
+    def __init__(
+        self,
+        email_delivery: EmailDeliveryPort,
+        dns: DnsPort,
+        domain_storage: DomainStorage,
+        interval: float = 900,
+        max_concurrency: int = 4
+    ):
+        self.email_delivery = email_delivery
+        self.dns = dns
+        self.domain_storage = domain_storage
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+
+        self._domain_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="domain-reconciler",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Started domain reconciler (interval={self.interval}s)")
+
+    def shutdown(self, timeout: float = 5):
+        self._shutdown.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def reconcile_all(self) -> List[ReconcileResult]:
+        domains = [
+            registered.domain for registered in self.domain_storage.get_domains()
+            if registered.status in ["pending", "verified"]
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="reconcile") as executor:
+            results = list(executor.map(self.reconcile, domains))
+
+        changed = [result for result in results if result.records_created or result.records_deleted or result.routes_created or result.routes_deleted]
+        failed = [result for result in results if result.error]
+        logger.info(f"Reconciled {len(results)} domains, changed={len(changed)}, failed={len(failed)}")
+
+        return results
+
+    def reconcile(self, domain: str) -> ReconcileResult:
+        result = ReconcileResult(domain=domain)
+        sub, apex = split_domain(domain)
+
+        if not sub:
+            result.error = "Reconciling apex domains is not implemented"
+            return result
+
+        # A domain is reconciled by one caller at a time, or both would create the same records
+        with self._get_domain_lock(domain):
+            try:
+                self._reconcile_records(domain, sub, apex, result)
+                self._reconcile_routes(domain, result)
+            except Exception as e:
+                logger.error(f"Failed to reconcile domain={domain}: {e}")
+                result.error = str(e)
+
+        return result
+
+    def _reconcile_records(self, domain: str, sub: str, apex: str, result: ReconcileResult):
+        desired = {_record_key(record, apex): record for record in self._get_desired_records(domain, sub, apex)}
+        actual = {_record_key(record, apex): record for record in self.dns.get_records(apex, sub)}
+
+        missing = [record for key, record in desired.items() if key not in actual]
+
+        # Only records of a kind we publish are ours to replace, eg. an older DKIM key. Other
+        # records on the same name, like a TXT site verification, are left alone
+        managed = {_record_kind(key) for key in desired.keys()}
+        stale = [
+            record for key, record in actual.items()
+            if key not in desired and _record_kind(key) in managed
+        ]
+
+        if missing:
+            logger.info(f"Creating {len(missing)} missing DNS records for domain={domain}")
+            if not self.dns.create_records(apex, sub, missing):
+                raise Exception(f"Failed to create {len(missing)} DNS records")
+            result.records_created = len(missing)
+
+        for record in stale:
+            logger.info(f"Deleting stale DNS record={record} for domain={domain}")
+            if self.dns.delete_record(apex, record):
+                result.records_deleted += 1
+
+    def _reconcile_routes(self, domain: str, result: ReconcileResult):
+        routes = self.email_delivery.get_inbound_routes(domain)
+
+        # Keep one up to date route, every other route forwards the same email again
+        keep = next((route for route in routes if route.up_to_date), None)
+
+        for route in routes:
+            if route is keep:
+                continue
+            logger.info(f"Deleting duplicate route={route.route_id} for domain={domain}")
+            if self.email_delivery.delete_inbound_route(route.route_id):
+                result.routes_deleted += 1
+
+        if keep is None:
+            logger.info(f"Creating inbound route for domain={domain}")
+            if not self.email_delivery.setup_inbound_email_processing(domain):
+                raise Exception("Failed to create inbound route")
+            result.routes_created = 1
+
+    def _get_desired_records(self, domain: str, sub: str, apex: str) -> List[DNSRecord]:
+        # The provider is the source of truth, the registry's copy goes stale when keys rotate
+        records = self.email_delivery.get_subdomain_records(sub, apex)
+
+        registered = self.domain_storage.get_domain(domain)
+        if registered is None:
+            return records
+
+        stored = [DNSRecord(**record) for record in json.loads(registered.dns_records)]
+        if _record_set(stored) != _record_set(records):
+            logger.info(f"DNS records of domain={domain} changed at the provider, updating the registry")
+            self.domain_storage.save_domain(registered.model_copy(update={
+                "dns_records": json.dumps([record.model_dump() for record in records]),
+                "updated_at": datetime.datetime.now()
+            }))
+
+        return records
+
+    def _get_domain_lock(self, domain: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._domain_locks.setdefault(domain, threading.Lock())
+
+    def _run(self):
+        while not self._shutdown.wait(self.interval):
+            try:
+                self.reconcile_all()
+            except Exception as e:
+                logger.error(f"Error in reconciliation cycle: {e}", exc_info=True)
+
+
+def _record_key(record: DNSRecord, apex: str) -> Tuple[str, str, str]:
+    # Names are either fully qualified or relative to the apex
+    name = record.name if record.name.endswith(apex) else f"{record.name}.{apex}"
+    return name.lower(), record.record_type, normalize_record_value(record.record_type, record.value)
+
+
+def _record_set(records: List[DNSRecord]) -> Set[Tuple[str, str, str, Optional[int]]]:
+    return {(record.name, record.record_type, record.value, record.priority) for record in records}
+
+
+def _record_kind(key: Tuple[str, str, str]) -> Tuple[str, str, str]:
+    """
+    (name, type, tag) of a record key. TXT records are told apart by their leading tag,
+    eg. "v=spf1" or "k=rsa". Every MX or CNAME record on a name we publish to is ours
+    """
+    name, record_type, value = key
+    if record_type != "TXT":
+        return name, record_type, ""
+
+    tag = value.replace(";", " ").split(" ", 1)[0]
+    return name, record_type, tag.lower()
@@ -1,14 +1,21 @@
-from typing import Protocol, Optional, Callable, Literal
+import datetime
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol, Optional, Callable, Literal, List, Dict
 
 from pydantic import BaseModel
 
-from adapters import EmailDeliveryPort, DnsPort
+from adapters import EmailDeliveryPort, DnsPort, DnsResolverPort
+from storage import DomainVerificationStorage, DomainStorage, DomainSchema
+from common_types import DNSRecord
 from services.errors import (
     DomainAccessError,
     SubdomainCreationError,
     DomainVerificationError
 )
 from .dns_verifier import DnsVerifier
+from .domain_reconciler import DomainReconciler
 
 from util.domain_utils import split_domain
 
@@ -19,6 +26,11 @@ class RegisterDomainResult(BaseModel):
     domain: str
     status: Literal["pending", "verified"]
 
+class BulkRegisterDomainResult(BaseModel):
+    domain: str
+    status: Literal["pending", "verified", "failed"]
+    error: Optional[str] = None
+
 
 class IDomainService(Protocol):
     def register_domain(
@@ -27,6 +39,15 @@ class IDomainService(Protocol):
         verified_callback: Optional[Callable[[], None]]
     ) -> RegisterDomainResult: ...
 
+    def register_domains(
+        self,
+        domains: List[str]
+    ) -> List[BulkRegisterDomainResult]:
+        """
+        Registers many domains at once, a failed domain does not fail the others
+        """
+        ...
+
     def verify_domain(
         self,
         domain: str
@@ -39,17 +60,44 @@ class IDomainService(Protocol):
     ) -> bool:
         ...
 
+    def shutdown(self):
+        ...
+
 
 class DomainService(IDomainService):
     def __init__(
         self,
         email_delivery: EmailDeliveryPort,
-        dns: DnsPort
+        dns: DnsPort,
+        domain_storage: DomainStorage,
+        verification_storage: Optional[DomainVerificationStorage] = None,
+        dns_resolver: Optional[DnsResolverPort] = None,
+        verify_concurrency: int = 16,
+        verify_timeout: float = 30,
+        provision_concurrency: int = 8,
+        reconcile_interval: float = 900
     ):
         self.email_delivery = email_delivery
         self.dns = dns
+        self.domain_storage = domain_storage
+        self.provision_concurrency = provision_concurrency
         
-        self.dns_verifier = DnsVerifier(email_delivery)
+        self.dns_verifier = DnsVerifier(
+            email_delivery,
+            verification_storage=verification_storage,
+            resolver=dns_resolver,
+            on_finished=self._on_verification_finished,
+            get_expected_records=self._get_registered_records,
+            max_concurrency=verify_concurrency,
+            verify_timeout=verify_timeout
+        )
+        
+        self.reconciler = DomainReconciler(
+            email_delivery,
+            dns,
+            domain_storage,
+            interval=reconcile_interval
+        )
     
     def register_domain(
         self, 
@@ -59,8 +107,7 @@ class DomainService(IDomainService):
         """
         Create the domain on the DNS and EDS
         """
-        # Check the status of the domain
-        domain_status = self.dns_verifier.get_domain_status(domain)
+        domain_status = self._get_known_status(domain)
         
         if domain_status:
             return RegisterDomainResult(
@@ -71,24 +118,63 @@ class DomainService(IDomainService):
         sub, apex = split_domain(domain)
 
         # Can we see the apex DNS
-        try:
-            self.dns.exists_records(apex, sub or "@")
-        except Exception as e:
-            raise DomainAccessError(str(e))
+        self._check_apex_access(apex, sub)
         
         # Create the subdomain on DNS + EDS
         if sub:
-            domain_valid = self._create_subdomain(sub, apex, verified_callback)
+            return self._provision_subdomain(domain, sub, apex, verified_callback)
         else:
             raise NotImplementedError("Setting up apex is not implemented")
+
+    def register_domains(
+        self,
+        domains: List[str]
+    ) -> List[BulkRegisterDomainResult]:
+        """
+        Provisions the domains concurrently, at most provision_concurrency at a time.
         
-        # Setup inbound email processing on this domain
-        self.email_delivery.setup_inbound_email_processing(domain)
+        Each apex is checked once, which also loads its record set for the per domain checks.
+        """
+        ordered = list(dict.fromkeys(domains))
+        results: Dict[str, BulkRegisterDomainResult] = {}
+        by_apex: Dict[str, List[str]] = {}
         
-        return RegisterDomainResult(
-            domain=domain,
-            status="verified" if domain_valid else "pending"
-        )
+        for domain in ordered:
+            domain_status = self._get_known_status(domain)
+            sub, apex = split_domain(domain)
+            
+            if domain_status:
+                results[domain] = BulkRegisterDomainResult(domain=domain, status=domain_status)
+            elif not sub:
+                results[domain] = BulkRegisterDomainResult(domain=domain, status="failed", error="Setting up apex is not implemented")
+            else:
+                by_apex.setdefault(apex, []).append(domain)
+        
+        logger.info(f"Provisioning {sum(len(apex_domains) for apex_domains in by_apex.values())} domains across {len(by_apex)} apex domains")
+        
+        with ThreadPoolExecutor(max_workers=self.provision_concurrency, thread_name_prefix="provision") as executor:
+            apexes = list(by_apex.keys())
+            apex_errors = dict(zip(apexes, executor.map(self._get_apex_access_error, apexes)))
+            
+            futures = {}
+            for apex, apex_domains in by_apex.items():
+                for domain in apex_domains:
+                    if apex_errors[apex]:
+                        results[domain] = BulkRegisterDomainResult(domain=domain, status="failed", error=apex_errors[apex])
+                        continue
+                    
+                    sub, _ = split_domain(domain)
+                    futures[domain] = executor.submit(self._provision_subdomain, domain, sub, apex, None)
+            
+            for domain, future in futures.items():
+                try:
+                    result = future.result()
+                    results[domain] = BulkRegisterDomainResult(domain=domain, status=result.status)
+                except Exception as e:
+                    logger.error(f"Failed to provision domain={domain}: {e}")
+                    results[domain] = BulkRegisterDomainResult(domain=domain, status="failed", error=str(e))
+        
+        return [results[domain] for domain in ordered]
 
 
     def verify_domain(
@@ -96,6 +182,11 @@ class DomainService(IDomainService):
         domain: str
     ) -> bool:
         success = self.email_delivery.verify_domain(domain)
+        
+        if success:
+            registered = self.domain_storage.get_domain(domain)
+            if registered is None or registered.status != "verified":
+                self._save_domain(domain, "verified")
 
         return success
 
@@ -119,10 +210,90 @@ class DomainService(IDomainService):
                 return False
         else:
             raise NotImplementedError("Apex domain not implemented yet")
+        
+        self._save_domain(domain, "deleted")
     
         return True
 
 
+    def start(self):
+        self.dns_verifier.start()
+        self.reconciler.start()
+
+    def shutdown(self):
+        self.reconciler.shutdown()
+        self.dns_verifier.shutdown()
+
+
+    def _get_known_status(self, domain: str) -> Optional[Literal["pending", "verified"]]:
+        # Domains we already manage are answered from the registry
+        registered = self.domain_storage.get_domain(domain)
+        
+        if registered and registered.status in ["pending", "verified"]:
+            return registered.status
+        
+        return self.dns_verifier.get_domain_status(domain)
+
+    def _check_apex_access(self, apex: str, sub: str = ""):
+        try:
+            self.dns.exists_records(apex, sub or "@")
+        except Exception as e:
+            raise DomainAccessError(str(e))
+
+    def _get_apex_access_error(self, apex: str) -> Optional[str]:
+        try:
+            self._check_apex_access(apex)
+        except DomainAccessError as e:
+            return f"Cannot access DNS of {apex}: {e}"
+        return None
+
+    def _provision_subdomain(
+        self,
+        domain: str,
+        sub: str,
+        apex: str,
+        verified_callback: Optional[Callable[[], None]] = None
+    ) -> RegisterDomainResult:
+        domain_valid = self._create_subdomain(sub, apex, verified_callback)
+        
+        # Fill in missing records and inbound routes, without duplicating existing ones
+        result = self.reconciler.reconcile(domain)
+        if result.error:
+            logger.error(f"Domain {domain} is not fully set up, the background reconciler will retry: {result.error}")
+        
+        return RegisterDomainResult(
+            domain=domain,
+            status="verified" if domain_valid else "pending"
+        )
+
+    def _on_verification_finished(self, domain: str, status: str):
+        self._save_domain(domain, "verified" if status == "verified" else "failed")
+
+    def _save_domain(self, domain: str, status: str, dns_records: Optional[List[DNSRecord]] = None):
+        """
+        Records the domain's new state in the registry, keeping what is already known about it
+        """
+        now = datetime.datetime.now()
+        registered = self.domain_storage.get_domain(domain)
+        
+        if registered is None:
+            registered = DomainSchema(
+                domain=domain,
+                status=status,
+                dns_records="[]",
+                created_at=now,
+                updated_at=now
+            )
+        
+        update = {"status": status, "updated_at": now}
+        if dns_records is not None:
+            update["dns_records"] = json.dumps([record.model_dump() for record in dns_records])
+        if status == "verified":
+            update["verified_at"] = registered.verified_at or now
+        
+        self.domain_storage.save_domain(registered.model_copy(update=update))
+
+
     def _subdomain_verification_complete_builder(self, verified_callback: Optional[Callable[[], None]] = None) -> Callable[[str], None]:
         def _subdomain_verification_complete(domain: str):
             if verified_callback:
@@ -141,18 +312,46 @@ class DomainService(IDomainService):
         Returns True if the domain is created, and false if it is pending
         """
         
+        domain = f"{sub}.{apex}"
+        
         if not (self.dns.exists_records(apex, sub) or self.email_delivery.subdomain_exists(sub, apex)):
             records = self.email_delivery.create_subdomain(sub, apex)
             if not self.dns.create_records(apex, sub, records):
-                raise SubdomainCreationError(f"DNS creation failed for {sub}.{apex}")
-                
-            domain_pending = self.dns_verifier.add_pending_dns_verification(
-                f"{sub}.{apex}",
-                completion_function=self._subdomain_verification_complete_builder(verified_callback),
-                error_function=self._subdomain_verification_error_builder()
-            )
+                raise SubdomainCreationError(f"DNS creation failed for {domain}")
+            
+            self._save_domain(domain, "pending", records)
+        else:
+            # Created before, eg. by a registration whose verification failed, so it may not be verified
+            records = self._get_registered_records(domain)
+            if self._try_verify(domain):
+                self._save_domain(domain, "verified")
+                return True
             
-            return not domain_pending
+            self._save_domain(domain, "pending")
         
-        # Already exists
-        return True
+        domain_pending = self.dns_verifier.add_pending_dns_verification(
+            domain,
+            completion_function=self._subdomain_verification_complete_builder(verified_callback),
+            error_function=self._subdomain_verification_error_builder(),
+            expected_records=records
+        )
+        
+        # Only refused for domains the verifier has already verified
+        if not domain_pending:
+            self._save_domain(domain, "verified")
+        
+        return not domain_pending
+
+    def _try_verify(self, domain: str) -> bool:
+        try:
+            return self.email_delivery.verify_domain(domain)
+        except Exception as e:
+            logger.warning(f"Could not verify existing domain={domain}, queueing it for verification: {e}")
+            return False
+
+    def _get_registered_records(self, domain: str) -> List[DNSRecord]:
+        registered = self.domain_storage.get_domain(domain)
+        if registered is None:
+            return []
+        
+        return [DNSRecord(**record) for record in json.loads(registered.dns_records)]
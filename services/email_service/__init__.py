@@ -1,7 +1,17 @@
 from .email_service import IEmailService
 from .email_service_provider import EmailServiceProvider
+from .send_queue import SendQueue
+from .rate_limiter import DomainRateLimiter
+from .email_scheduler import EmailScheduler
+from .compose import build_send_queue, build_rate_limiter, build_email_scheduler
 
 __all__ = [
     "IEmailService",
-    "EmailServiceProvider"
+    "EmailServiceProvider",
+    "SendQueue",
+    "DomainRateLimiter",
+    "build_send_queue",
+    "build_rate_limiter",
+    "EmailScheduler",
+    "build_email_scheduler"
 ]
\ No newline at end of file
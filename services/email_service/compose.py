@@ -1,16 +1,99 @@
+from typing import Optional
+
 from adapters import EmailDeliveryPort
-from storage import InboxStorageManager, EmailAccountStorage
+from storage import InboxStorageManager, EmailAccountStorage, OutboxStorage, InboxSchema, ScheduledEmailStorage
+from common_types import OutboundEmailRecord
 from .email_service import EmailService, IEmailService
+from .send_queue import SendQueue
+from .rate_limiter import DomainRateLimiter
+from .email_scheduler import EmailScheduler
 
 def build_email_service(
     inbox_id: str,
     email_delivery: EmailDeliveryPort,
     inbox_storage_manager: InboxStorageManager,
-    email_account_storage: EmailAccountStorage
+    email_account_storage: EmailAccountStorage,
+    send_queue: SendQueue
 ) -> IEmailService:
     return EmailService(
         inbox_id=inbox_id,
         email_delivery=email_delivery,
         inbox_storage_manager=inbox_storage_manager,
-        email_account_storage=email_account_storage
+        email_account_storage=email_account_storage,
+        send_queue=send_queue
+    )
+
+
+def build_send_queue(
+    email_delivery: EmailDeliveryPort,
+    inbox_storage_manager: InboxStorageManager,
+    outbox_storage: OutboxStorage,
+    workers: int = 4,
+    max_attempts: int = 5,
+    rate_limiter: Optional[DomainRateLimiter] = None
+) -> SendQueue:
+    def _save_sent_email(message: OutboundEmailRecord):
+        inbox_storage = inbox_storage_manager.get_or_create_inbox_storage(message.from_email)
+        
+        # One row per recipient, written together. A batch shares one provider id, so each
+        # of its rows is told apart by its recipient
+        is_batch = len(message.recipients) > 1
+        inbox_storage.save_emails([
+            InboxSchema(
+                inbox_id=inbox_storage.inbox_id,
+                message_id=f"{message.provider_message_id}/{to_email}" if is_batch else message.provider_message_id,
+                from_email=message.from_email,
+                to_email=to_email,
+                subject=message.subject,
+                body=message.body,
+                timestamp=message.updated_at
+            ) for to_email in message.recipients
+        ])
+
+    send_queue = SendQueue(
+        email_delivery,
+        outbox_storage,
+        on_sent=_save_sent_email,
+        rate_limiter=rate_limiter,
+        workers=workers,
+        max_attempts=max_attempts
+    )
+    send_queue.start()
+    return send_queue
+
+
+
+def build_rate_limiter(
+    default_rate: float = 10.0,
+    domain_rates: str = ""
+) -> DomainRateLimiter:
+    """
+    domain_rates overrides the rate for specific sending domains, eg. "a.example.com=5,b.example.com=2"
+    """
+    rates = {}
+    for item in domain_rates.split(","):
+        if "=" not in item:
+            continue
+        domain, rate = item.split("=", 1)
+        rates[domain.strip()] = float(rate)
+
+    return DomainRateLimiter(
+        default_rate=default_rate,
+        rates=rates
+    )
+
+
+def build_email_scheduler(
+    email_service_provider,
+    scheduled_email_storage: ScheduledEmailStorage,
+    outbox_storage: OutboxStorage,
+    batch_size: int = 500
+) -> EmailScheduler:
+    email_scheduler = EmailScheduler(
+        email_service_provider,
+        scheduled_email_storage,
+        outbox_storage,
+        batch_size=batch_size
     )
+    email_scheduler.start()
+    return email_scheduler
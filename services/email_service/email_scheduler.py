@@ -0,0 +1,186 @@
+import datetime
+import heapq
+import threading
+import time
+import uuid
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from storage import ScheduledEmailStorage, ScheduledEmailSchema, OutboxStorage
+
+if TYPE_CHECKING:
+    # The provider builds email services through compose, which builds this scheduler
+    from .email_service_provider import EmailServiceProvider
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class EmailScheduler:
+    """
+    Sends emails at a later time.
+
+    Scheduled emails are persisted, then kept in a heap ordered by send time. A single thread
+    sleeps until the earliest one is due, and dispatches up to `batch_size` due emails per wakeup
+    through their inbox's EmailService. Scheduling and dispatching are both O(log n).
+    """
+    def __init__(
+        self,
+        email_service_provider: "EmailServiceProvider",
+        scheduled_email_storage: ScheduledEmailStorage,
+        outbox_storage: OutboxStorage,
+        batch_size: int = 500
+    ):
+        self.email_service_provider = email_service_provider
+        self.scheduled_email_storage = scheduled_email_storage
+        self.outbox_storage = outbox_storage
+        self.batch_size = batch_size
+
+        self.scheduled: Dict[str, ScheduledEmailSchema] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._condition = threading.Condition()
+        self._shutdown = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Load scheduled emails from storage and start the dispatch thread"""
+        if self._thread is not None:
+            return
+
+        self._resume_scheduled()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="email-scheduler",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Started email scheduler with {len(self.scheduled)} scheduled emails")
+
+    def schedule(
+        self,
+        inbox_id: str,
+        to_email: str,
+        subject: str,
+        body: str,
+        send_at: datetime.datetime
+    ) -> ScheduledEmailSchema:
+        scheduled_email = ScheduledEmailSchema(
+            schedule_id=str(uuid.uuid4()),
+            inbox_id=inbox_id,
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            send_at=send_at,
+            status="scheduled",
+            created_at=datetime.datetime.now()
+        )
+
+        self.scheduled_email_storage.save_scheduled_email(scheduled_email)
+        self._push(scheduled_email)
+
+        logger.info(f"Scheduled email schedule_id={scheduled_email.schedule_id} for {send_at}")
+
+        return scheduled_email.model_copy()
+
+    def get_scheduled(self, schedule_id: str) -> Optional[ScheduledEmailSchema]:
+        with self._condition:
+            scheduled_email = self.scheduled.get(schedule_id)
+            return scheduled_email.model_copy() if scheduled_email else None
+
+    def shutdown(self, timeout: float = 5):
+        logger.info("Shutting down email scheduler...")
+        self._shutdown.set()
+
+        with self._condition:
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+        logger.info("Email scheduler shutdown complete")
+
+    def _push(self, scheduled_email: ScheduledEmailSchema):
+        with self._condition:
+            self.scheduled[scheduled_email.schedule_id] = scheduled_email
+
+            entry = (scheduled_email.send_at.timestamp(), scheduled_email.schedule_id)
+            heapq.heappush(self._heap, entry)
+
+            # Only wake the dispatcher if this is now the earliest email
+            if self._heap[0] == entry:
+                self._condition.notify()
+
+    def _resume_scheduled(self):
+        pending = self.scheduled_email_storage.get_pending_scheduled_emails()
+        if not pending:
+            return
+
+        # Emails handed to the send queue before we stopped but not yet marked dispatched
+        dispatched_ids = self.outbox_storage.get_message_ids()
+
+        already_dispatched = []
+        for scheduled_email in pending:
+            if scheduled_email.schedule_id in dispatched_ids:
+                already_dispatched.append(
+                    scheduled_email.model_copy(update={"status": "dispatched"})
+                )
+            else:
+                self._push(scheduled_email)
+
+        if already_dispatched:
+            self.scheduled_email_storage.save_scheduled_emails(already_dispatched)
+
+    def _run(self):
+        while not self._shutdown.is_set():
+            due = self._wait_for_due()
+            if due:
+                self._dispatch(due)
+
+    def _wait_for_due(self) -> List[ScheduledEmailSchema]:
+        """Sleep until the earliest email is due, then pop up to batch_size due emails"""
+        with self._condition:
+            while not self._shutdown.is_set():
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+                due = []
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                    _, schedule_id = heapq.heappop(self._heap)
+                    scheduled_email = self.scheduled.pop(schedule_id, None)
+                    if scheduled_email is not None:
+                        due.append(scheduled_email)
+
+                return due
+
+        return []
+
+    def _dispatch(self, due: List[ScheduledEmailSchema]):
+        results = []
+
+        for scheduled_email in due:
+            try:
+                email_service = self.email_service_provider.get_by_inbox_id(scheduled_email.inbox_id)
+                email_service.send_email(
+                    to_email=scheduled_email.to_email,
+                    subject=scheduled_email.subject,
+                    body=scheduled_email.body,
+                    message_id=scheduled_email.schedule_id
+                )
+                status = "dispatched"
+            except Exception as e:
+                logger.error(f"Failed dispatching scheduled email schedule_id={scheduled_email.schedule_id}: {e}")
+                status = "failed"
+
+            results.append(scheduled_email.model_copy(update={"status": status}))
+
+        self.scheduled_email_storage.save_scheduled_emails(results)
+        logger.info(f"Dispatched {len(results)} scheduled emails")
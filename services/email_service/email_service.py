@@ -1,22 +1,47 @@
 from adapters import EmailDeliveryPort
-from storage import InboxStorageManager, EmailAccountStorage
+from storage import InboxStorageManager, EmailAccountStorage, StoredEmail, EmailQuery
 
-from common_types import EmailRecord, IncomingEmailRecord
+from common_types import IncomingEmailRecord, OutboundEmailRecord
+from .send_queue import SendQueue
 
-from typing import Protocol, Callable, List
+from typing import Protocol, Callable, Iterator, List, Optional
+from itertools import islice
 from datetime import datetime
+from pydantic import BaseModel
 
 import logging
 logger = logging.getLogger(__name__)
 
+class EmailPage(BaseModel):
+    emails: List[StoredEmail]
+    next_position: Optional[int] = None # Set when more emails match, pass it back as after
+
 
 class IEmailService(Protocol):
     def send_email(
         self,
         to_email: str,
         subject: str,
+        body: str,
+        message_id: Optional[str] = None
+    ) -> OutboundEmailRecord:
+        """
+        Queues an email for delivery, returning a handle to track it
+        """
+        ...
+    
+    def send_batch(
+        self,
+        to_emails: List[str],
+        subject: str,
         body: str
-    ): 
+    ) -> List[OutboundEmailRecord]:
+        """
+        Queues the same email to many recipients, sent in as few provider calls as possible
+        """
+        ...
+    
+    def get_outbound_email(self, message_id: str) -> Optional[OutboundEmailRecord]:
         ...
     
     def handle_incoming_email(self, incoming_email: IncomingEmailRecord):
@@ -25,7 +50,31 @@ class IEmailService(Protocol):
     def on_received_email(self, received_email_callback: Callable):
         ...
 
-    def get_emails(self) -> List[EmailRecord]:
+    def list_emails(
+        self,
+        query: EmailQuery,
+        after: Optional[int] = None,
+        limit: int = 50
+    ) -> EmailPage:
+        """
+        Gets a page of the emails matching the query, in arrival order
+        """
+        ...
+
+    def get_version(self) -> int:
+        """
+        Changes whenever the inbox's stored emails change
+        """
+        ...
+
+    def iter_emails(
+        self,
+        query: EmailQuery,
+        after: Optional[int] = None
+    ) -> Iterator[StoredEmail]:
+        """
+        Streams every email matching the query in arrival order, reading them from storage as it goes
+        """
         ...
 
 
@@ -35,11 +84,13 @@ class EmailService(IEmailService):
         inbox_id: str,
         email_delivery: EmailDeliveryPort,
         inbox_storage_manager: InboxStorageManager,
-        email_account_storage: EmailAccountStorage
+        email_account_storage: EmailAccountStorage,
+        send_queue: SendQueue
     ):
         logger.info(f"Initializing email service for {inbox_id}")
         self.inbox_id = inbox_id
         self.email_delivery = email_delivery
+        self.send_queue = send_queue
                 
         # Load the email from inbox_id
         self.email = email_account_storage.get_email_address(inbox_id)
@@ -52,30 +103,39 @@ class EmailService(IEmailService):
         self,
         to_email: str,
         subject: str,
-        body: str
-    ):
-        logger.info(f"Sending email from {self.email} to {to_email}")
-        try:
-            email_id = self.email_delivery.send_email(
-                self.email,
-                to_email,
-                subject, body
-            )
-        except Exception as e:
-            logger.error(f"Failure sending email, error={e}")
-            return False
-
-        # Save to inbox
-        self.storage.save_email(
-            message_id=email_id,
+        body: str,
+        message_id: Optional[str] = None
+    ) -> OutboundEmailRecord:
+        logger.info(f"Queueing email from {self.email} to {to_email}")
+        return self.send_queue.enqueue(
+            inbox_id=self.inbox_id,
             from_email=self.email,
             to_email=to_email,
             subject=subject,
             body=body,
-            timestamp=datetime.now()
+            message_id=message_id
         )
 
-        return True
+    def send_batch(
+        self,
+        to_emails: List[str],
+        subject: str,
+        body: str
+    ) -> List[OutboundEmailRecord]:
+        logger.info(f"Queueing batch email from {self.email} to {len(to_emails)} recipients")
+        return self.send_queue.enqueue_batch(
+            inbox_id=self.inbox_id,
+            from_email=self.email,
+            to_emails=to_emails,
+            subject=subject,
+            body=body
+        )
+
+    def get_outbound_email(self, message_id: str) -> Optional[OutboundEmailRecord]:
+        message = self.send_queue.get_status(message_id)
+        if message is None or message.inbox_id != self.inbox_id:
+            return None
+        return message
     
     def handle_incoming_email(self, incoming_email: IncomingEmailRecord):
         logger.info(f"Handling incoming email from {incoming_email.sender} to {incoming_email.recipient}")
@@ -93,16 +153,29 @@ class EmailService(IEmailService):
     def on_received_email(self, received_email_callback: Callable):
         ...
 
-    def get_emails(self) -> List[EmailRecord]:
-        emails = self.storage.get_emails()
-
-        return [
-            EmailRecord(
-                from_email=record.from_email,
-                to_email=record.to_email,
-                subject=record.subject,
-                body=record.body,
-                message_time=record.timestamp,
-            ) for record in emails
-        ]
+    def list_emails(
+        self,
+        query: EmailQuery,
+        after: Optional[int] = None,
+        limit: int = 50
+    ) -> EmailPage:
+        # One extra email tells whether there is a next page
+        emails = list(islice(
+            self.storage.iter_emails(query, after=after, batch_size=limit + 1),
+            limit + 1
+        ))
+
+        if len(emails) > limit:
+            return EmailPage(emails=emails[:limit], next_position=emails[limit - 1].position)
+
+        return EmailPage(emails=emails)
+
+    def iter_emails(
+        self,
+        query: EmailQuery,
+        after: Optional[int] = None
+    ) -> Iterator[StoredEmail]:
+        return self.storage.iter_emails(query, after=after)
 
+    def get_version(self) -> int:
+        return self.storage.get_version()
@@ -2,29 +2,39 @@ from adapters import EmailDeliveryPort
 from storage import InboxStorageManager, EmailAccountStorage
 from .email_service import IEmailService
 from .compose import build_email_service
+from .send_queue import SendQueue
 
-from typing import Dict
+from common_types import InboxRecord
+
+from typing import Dict, List
 
 class EmailServiceProvider:
     def __init__(
         self,
         email_delivery: EmailDeliveryPort,
         inbox_storage_manager: InboxStorageManager,
-        email_account_storage: EmailAccountStorage
+        email_account_storage: EmailAccountStorage,
+        send_queue: SendQueue
     ):
         self.email_delivery = email_delivery
         self.inbox_storage_manager = inbox_storage_manager
         self.email_account_storage = email_account_storage
+        self.send_queue = send_queue
         
         self.email_services: Dict[str, IEmailService] = {}
     
     def get_by_inbox_id(self, inbox_id: str) -> IEmailService:
         if inbox_id not in self.email_services:
+            # Deleted inboxes must not be cached again
+            if self.email_account_storage.get_email_address(inbox_id) is None:
+                raise ValueError(f"No inbox found for id={inbox_id}")
+            
             self.email_services[inbox_id] = build_email_service(
                 inbox_id=inbox_id,
                 email_delivery=self.email_delivery,
                 inbox_storage_manager=self.inbox_storage_manager,
-                email_account_storage=self.email_account_storage
+                email_account_storage=self.email_account_storage,
+                send_queue=self.send_queue
             )
 
         return self.email_services[inbox_id]
@@ -36,3 +46,11 @@ class EmailServiceProvider:
             raise ValueError(f"No inbox found for {email}")
         
         return self.get_by_inbox_id(inbox_id)
+
+    def evict_inboxes(self, inboxes: List[InboxRecord]):
+        """
+        Drops the cached services and inbox storages of deleted inboxes
+        """
+        for inbox in inboxes:
+            self.email_services.pop(inbox.inbox_id, None)
+            self.inbox_storage_manager.evict(inbox.email)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from typing import Dict, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+
+    Tokens are reserved rather than polled for: a reservation always succeeds and returns
+    how long the caller must wait before using it. Waiting callers are therefore spaced out
+    evenly instead of all retrying at the moment a token frees up.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserve tokens, returning the seconds to wait before they may be used"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+        # May go negative, later reservations then wait until the debt is refilled
+        self.tokens -= tokens
+
+        if self.tokens >= 0:
+            return 0.0
+
+        return -self.tokens / self.rate
+
+
+class DomainRateLimiter:
+    """
+    Paces outbound email per sending domain.
+
+    Each domain gets its own token bucket, `rates` overrides the default rate (in messages
+    per second) for specific domains. Burst capacity defaults to one second worth of tokens.
+
+    Raises ValueError if any rate is not positive
+    """
+    def __init__(
+        self,
+        default_rate: float = 10.0,
+        default_burst: Optional[float] = None,
+        rates: Optional[Dict[str, float]] = None
+    ):
+        # A zero rate would never refill, fail on startup rather than on the first send
+        if default_rate <= 0:
+            raise ValueError(f"Send rate must be positive, default_rate={default_rate}")
+        for domain, rate in (rates or {}).items():
+            if rate <= 0:
+                raise ValueError(f"Send rate must be positive, domain={domain}, rate={rate}")
+
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.rates = rates or {}
+
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, domain: str, tokens: float = 1) -> float:
+        """Reserve tokens for the domain, returning the seconds to wait before sending"""
+        with self._lock:
+            bucket = self.buckets.get(domain)
+            if bucket is None:
+                rate = self.rates.get(domain, self.default_rate)
+                burst = self.default_burst if self.default_burst is not None else rate
+                bucket = TokenBucket(rate, max(burst, 1))
+                self.buckets[domain] = bucket
+
+            return bucket.reserve(tokens)
@@ -0,0 +1,431 @@
+import datetime
+import heapq
+import json
+import queue
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from adapters import EmailDeliveryPort, CircuitOpenError, CircuitTimeoutError
+from storage import OutboxStorage, OutboxSchema
+from common_types import OutboundEmailRecord
+from .rate_limiter import DomainRateLimiter
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SendQueue:
+    """
+    Delivers outbound emails on a pool of worker threads so the request path never
+    waits on the email delivery provider.
+
+    Every message is written to the outbox before it is dispatched and on every status
+    change after, so messages that were pending or sending when the process stopped are
+    picked up again by `start`. Delivery is therefore at-least-once.
+
+    Failed sends are retried with exponential backoff until `max_attempts` is reached,
+    after which the message is marked as failed. A send that timed out may still have been
+    delivered, so it is marked as unknown instead of being retried.
+
+    If a rate limiter is given, every send reserves tokens for its sending domain first. A send
+    that has to wait stays pending and is put back on the queue once its reservation is due,
+    so workers are never held up by a busy domain.
+
+    Delayed messages, retries and rate limited sends alike, wait in a heap ordered by due time.
+    A single scheduler thread sleeps until the earliest one is due and puts it back on the queue.
+    """
+    def __init__(
+        self,
+        email_delivery: EmailDeliveryPort,
+        outbox_storage: OutboxStorage,
+        on_sent: Optional[Callable[[OutboundEmailRecord], None]] = None,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        workers: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        max_tracked_messages: int = 10_000
+    ):
+        self.email_delivery = email_delivery
+        self.outbox_storage = outbox_storage
+        self.on_sent = on_sent
+        self.rate_limiter = rate_limiter
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_tracked_messages = max_tracked_messages
+
+        self.messages: "OrderedDict[str, OutboundEmailRecord]" = OrderedDict()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self._delayed: List[Tuple[float, str]] = [] # (due time, message_id) heap
+        self._delayed_condition = threading.Condition()
+        self._reserved: set[str] = set() # Messages holding a rate limit reservation
+        self._threads: List[threading.Thread] = []
+        self._scheduler_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Resume unfinished messages from the outbox and start the worker threads"""
+        if self._threads:
+            return
+
+        self._resume_unfinished()
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"send-queue-worker-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        self._scheduler_thread = threading.Thread(
+            target=self._run_scheduler,
+            name="send-queue-scheduler",
+            daemon=True
+        )
+        self._scheduler_thread.start()
+
+        logger.info(f"Started send queue with workers={self.workers}")
+
+    def enqueue(
+        self,
+        inbox_id: str,
+        from_email: str,
+        to_email: str,
+        subject: str,
+        body: str,
+        message_id: Optional[str] = None
+    ) -> OutboundEmailRecord:
+        """
+        Record an email in the outbox and queue it for delivery, returning a handle to track its status.
+
+        A message_id can be given to reuse an existing handle, eg. the id of a scheduled email
+        """
+        return self._enqueue_messages(
+            inbox_id, from_email, [[to_email]], subject, body,
+            message_ids=[message_id] if message_id else None
+        )[0]
+
+    def enqueue_batch(
+        self,
+        inbox_id: str,
+        from_email: str,
+        to_emails: List[str],
+        subject: str,
+        body: str
+    ) -> List[OutboundEmailRecord]:
+        """
+        Queue the same email to many recipients. Recipients are grouped into batches of at most
+        the provider's batch size, each batch is one outbox message sent with a single provider call.
+        """
+        batch_size = self.email_delivery.max_batch_size()
+        batches = [
+            to_emails[i:i + batch_size]
+            for i in range(0, len(to_emails), batch_size)
+        ]
+
+        return self._enqueue_messages(
+            inbox_id, from_email, batches, subject, body
+        )
+
+    def _enqueue_messages(
+        self,
+        inbox_id: str,
+        from_email: str,
+        batches: List[List[str]],
+        subject: str,
+        body: str,
+        message_ids: Optional[List[str]] = None
+    ) -> List[OutboundEmailRecord]:
+        if self._shutdown.is_set():
+            raise RuntimeError("Send queue is shutting down")
+
+        now = datetime.datetime.now()
+        if message_ids is None:
+            message_ids = [str(uuid.uuid4()) for _ in batches]
+
+        messages = [
+            OutboundEmailRecord(
+                message_id=message_id,
+                inbox_id=inbox_id,
+                from_email=from_email,
+                recipients=recipients,
+                subject=subject,
+                body=body,
+                status="pending",
+                created_at=now,
+                updated_at=now
+            ) for message_id, recipients in zip(message_ids, batches)
+        ]
+
+        # Persist before dispatching so a crash can never lose the message
+        self.outbox_storage.save_messages([
+            to_outbox_entry(message) for message in messages
+        ])
+
+        with self._lock:
+            for message in messages:
+                self.messages[message.message_id] = message
+            self._evict_finished()
+            # Copy before a worker can pick the messages up
+            handles = [message.model_copy() for message in messages]
+
+        for message in messages:
+            self._queue.put(message.message_id)
+            logger.info(f"Queued email message_id={message.message_id} from {from_email} to {len(message.recipients)} recipients")
+
+        return handles
+
+    def get_status(self, message_id: str) -> Optional[OutboundEmailRecord]:
+        with self._lock:
+            message = self.messages.get(message_id)
+            if message:
+                return message.model_copy()
+
+        # Evicted from memory, fall back to the outbox
+        entry = self.outbox_storage.get_message(message_id)
+        return from_outbox_entry(entry) if entry else None
+
+    def shutdown(self, timeout: float = 30):
+        """Stop accepting new messages and wait for in-flight sends to finish"""
+        logger.info("Shutting down send queue...")
+        self._shutdown.set()
+
+        # Delayed messages are left pending in the outbox, picked up again on the next start
+        with self._delayed_condition:
+            self._delayed.clear()
+            self._delayed_condition.notify_all()
+
+        if self._scheduler_thread is not None:
+            self._scheduler_thread.join(timeout=timeout)
+            self._scheduler_thread = None
+
+        for _ in self._threads:
+            self._queue.put(None)
+
+        for thread in self._threads:
+            thread.join(timeout=timeout / max(len(self._threads), 1))
+
+        self._threads = []
+        logger.info("Send queue shutdown complete")
+
+    def _resume_unfinished(self):
+        unfinished = self.outbox_storage.get_unfinished_messages()
+
+        for entry in unfinished:
+            message = from_outbox_entry(entry)
+            # A send may have been in flight when we stopped, retry it
+            message.status = "pending"
+
+            with self._lock:
+                self.messages[message.message_id] = message
+
+            self._queue.put(message.message_id)
+
+        if unfinished:
+            logger.info(f"Resumed {len(unfinished)} unfinished messages from the outbox")
+
+    def _worker(self):
+        while True:
+            message_id = self._queue.get()
+            try:
+                if message_id is None:
+                    return
+                self._process(message_id)
+            except Exception as e:
+                logger.error(f"Unexpected error in send queue worker: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, message_id: str):
+        with self._lock:
+            message = self.messages.get(message_id)
+            if message is None or message.status != "pending":
+                return
+
+            recipients = list(message.recipients)
+
+            if self.rate_limiter and message_id not in self._reserved:
+                _, domain = message.from_email.split("@", 1)
+                delay = self.rate_limiter.reserve(domain, len(recipients))
+                if delay > 0:
+                    self._reserved.add(message_id)
+                    self._schedule(message_id, delay)
+                    return
+
+            self._reserved.discard(message_id)
+
+            message.status = "sending"
+            message.attempts += 1
+            message.updated_at = datetime.datetime.now()
+            attempt = message.attempts
+
+        self._persist(message)
+
+        try:
+            if len(recipients) > 1:
+                provider_message_id = self.email_delivery.send_batch(
+                    message.from_email,
+                    recipients,
+                    message.subject,
+                    message.body
+                )
+            else:
+                provider_message_id = self.email_delivery.send_email(
+                    message.from_email,
+                    recipients[0],
+                    message.subject,
+                    message.body
+                )
+        except CircuitOpenError as e:
+            self._handle_unavailable(message, e.retry_after)
+            return
+        except CircuitTimeoutError as e:
+            self._handle_timeout(message, str(e))
+            return
+        except Exception as e:
+            self._handle_failure(message, attempt, str(e))
+            return
+
+        with self._lock:
+            message.status = "sent"
+            message.provider_message_id = provider_message_id
+            message.last_error = None
+            message.updated_at = datetime.datetime.now()
+            sent_message = message.model_copy()
+
+        logger.info(f"Sent email message_id={message.message_id} provider_id={provider_message_id}")
+
+        # Handle the sent message before marking it sent in the outbox, a crash in between causes a resend not a loss
+        if self.on_sent:
+            try:
+                self.on_sent(sent_message)
+            except Exception as e:
+                # Left unfinished in the outbox, so the next start sends it again rather than losing the copy
+                logger.error(f"Error in on_sent callback for message_id={message.message_id}, not marking it sent in the outbox: {e}")
+                return
+
+        self._persist(sent_message)
+
+    def _handle_failure(self, message: OutboundEmailRecord, attempt: int, error: str):
+        with self._lock:
+            message.last_error = error
+            message.updated_at = datetime.datetime.now()
+
+            if attempt >= self.max_attempts:
+                message.status = "failed"
+            else:
+                message.status = "pending"
+
+            failed_message = message.model_copy()
+
+        self._persist(failed_message)
+
+        if failed_message.status == "failed":
+            logger.error(f"Giving up on email message_id={message.message_id} after {attempt} attempts, error={error}")
+            return
+
+        delay = self.get_next_delay(attempt)
+
+        with self._lock:
+            self._schedule(message.message_id, delay)
+
+        logger.warning(f"Failed sending email message_id={message.message_id} (attempt {attempt}), retrying in {delay}s, error={error}")
+
+    def _handle_timeout(self, message: OutboundEmailRecord, error: str):
+        """The provider may or may not have accepted the send, resending could deliver it twice"""
+        with self._lock:
+            message.status = "unknown"
+            message.last_error = error
+            message.updated_at = datetime.datetime.now()
+            unknown_message = message.model_copy()
+
+        self._persist(unknown_message)
+        logger.error(f"Outcome unknown for email message_id={message.message_id}, not retrying, error={error}")
+
+    def _handle_unavailable(self, message: OutboundEmailRecord, retry_after: float):
+        """The provider circuit is open, wait for it without using up an attempt"""
+        with self._lock:
+            message.status = "pending"
+            message.attempts -= 1
+            message.updated_at = datetime.datetime.now()
+            pending_message = message.model_copy()
+
+            self._schedule(message.message_id, max(retry_after, self.base_delay))
+
+        self._persist(pending_message)
+        logger.info(f"Provider unavailable, delaying email message_id={message.message_id} by {retry_after:.1f}s")
+
+    def _schedule(self, message_id: str, delay: float):
+        """Put the message back on the queue after the delay"""
+        if self._shutdown.is_set():
+            # Left pending in the outbox, picked up again on the next start
+            return
+
+        with self._delayed_condition:
+            entry = (time.monotonic() + delay, message_id)
+            heapq.heappush(self._delayed, entry)
+
+            # Only wake the scheduler if this is now the earliest message
+            if self._delayed[0] == entry:
+                self._delayed_condition.notify()
+
+    def _run_scheduler(self):
+        """Sleep until the earliest delayed message is due, then queue every due message"""
+        with self._delayed_condition:
+            while not self._shutdown.is_set():
+                if not self._delayed:
+                    self._delayed_condition.wait()
+                    continue
+
+                delay = self._delayed[0][0] - time.monotonic()
+                if delay > 0:
+                    self._delayed_condition.wait(timeout=delay)
+                    continue
+
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, message_id = heapq.heappop(self._delayed)
+                    self._queue.put(message_id)
+
+    def _persist(self, message: OutboundEmailRecord):
+        self.outbox_storage.save_message(to_outbox_entry(message))
+
+    def get_next_delay(self, attempt: int) -> float:
+        """Calculate exponential backoff delay"""
+        return min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+
+    def _evict_finished(self):
+        """Drop the oldest finished messages once we track too many. Expects the lock to be held"""
+        excess = len(self.messages) - self.max_tracked_messages
+        if excess <= 0:
+            return
+
+        for message_id in list(self.messages.keys()):
+            if excess <= 0:
+                break
+            if self.messages[message_id].status in ("sent", "failed", "unknown"):
+                del self.messages[message_id]
+                excess -= 1
+
+
+def to_outbox_entry(message: OutboundEmailRecord) -> OutboxSchema:
+    return OutboxSchema(
+        **message.model_dump(exclude={"recipients"}),
+        recipients=json.dumps(message.recipients)
+    )
+
+
+def from_outbox_entry(entry: OutboxSchema) -> OutboundEmailRecord:
+    return OutboundEmailRecord(
+        **entry.model_dump(exclude={"recipients"}),
+        recipients=json.loads(entry.recipients)
+    )
@@ -1,14 +1,27 @@
+from typing import Callable, List, Optional
+
 from adapters import EmailDeliveryPort
-from storage import StorageManager, EmailAccountStorage
+from storage import StorageManager, EmailAccountStorage, DomainStorage, InboxTombstoneStorage
+from common_types import InboxRecord
 
 from services.inbox_service import IInboxService, InboxService
 
 def build_inbox_service(
     storage_manager: StorageManager,
     email_delivery: EmailDeliveryPort,
-    email_account_storage: EmailAccountStorage
+    email_account_storage: EmailAccountStorage,
+    domain_storage: DomainStorage,
+    tombstone_storage: InboxTombstoneStorage,
+    create_concurrency: int = 8,
+    delete_concurrency: int = 8,
+    on_inboxes_deleted: Optional[Callable[[List[InboxRecord]], None]] = None
 ) -> IInboxService:
     return InboxService(
         email_delivery=email_delivery,
-        email_account_storage=email_account_storage
+        email_account_storage=email_account_storage,
+        domain_storage=domain_storage,
+        tombstone_storage=tombstone_storage,
+        create_concurrency=create_concurrency,
+        delete_concurrency=delete_concurrency,
+        on_inboxes_deleted=on_inboxes_deleted
     )
\ No newline at end of file
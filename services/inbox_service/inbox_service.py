@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pydantic import BaseModel
-from typing import Protocol, Tuple, Optional, List
+from typing import Protocol, Tuple, Optional, List, Dict, Literal, Callable
 from adapters import EmailDeliveryPort, DnsPort
-from storage import EmailAccountStorage
+from storage import EmailAccountStorage, DomainStorage, InboxTombstoneStorage
 from services.errors import (
     DomainVerificationError,
     UserCreationError,
@@ -17,6 +19,22 @@ class CreateInboxResult(BaseModel):
     id: str
     message: str
 
+class BulkCreateInboxResult(BaseModel):
+    email: str
+    id: Optional[str] = None
+    status: Literal["created", "exists", "failed"]
+    error: Optional[str] = None
+
+class InboxPage(BaseModel):
+    inboxes: List[InboxRecord]
+    next_position: Optional[int] = None # Set when more inboxes match, pass it back as after
+
+class BulkDeleteInboxResult(BaseModel):
+    inbox_id: str
+    email: Optional[str] = None
+    status: Literal["deleted", "not_found", "failed"]
+    error: Optional[str] = None
+
 
 class IInboxService(Protocol):
     def create_inbox(self, email: str) -> CreateInboxResult:
@@ -24,6 +42,12 @@ class IInboxService(Protocol):
         Creates an inbox with the provided email
         """
         ...
+
+    def create_inboxes(self, emails: List[str]) -> List[BulkCreateInboxResult]:
+        """
+        Creates many inboxes at once, a failed inbox does not fail the others
+        """
+        ...
     
     def get_inbox(self, email: str) -> str:
         """
@@ -31,9 +55,20 @@ class IInboxService(Protocol):
         """
         ...
 
-    def list_inboxes(self, domain: Optional[str] = None) -> List[InboxRecord]:
+    def list_inboxes(
+        self,
+        domain: Optional[str] = None,
+        after: Optional[int] = None,
+        limit: int = 100
+    ) -> InboxPage:
+        """
+        Gets a page of the inboxes, only those on the given domain if set, in creation order
+        """
+        ...
+
+    def get_version(self) -> int:
         """
-        Gets all the inboxes on a given domain
+        Changes whenever an inbox is created or deleted
         """
         ...
 
@@ -43,15 +78,31 @@ class IInboxService(Protocol):
         """
         ...
 
+    def delete_inboxes(self, inbox_ids: List[str]) -> List[BulkDeleteInboxResult]:
+        """
+        Deletes many inboxes and their stored mail, a failed inbox does not fail the others
+        """
+        ...
+
 
 class InboxService(IInboxService):
     def __init__(
         self,
         email_delivery: EmailDeliveryPort,
-        email_account_storage: EmailAccountStorage
+        email_account_storage: EmailAccountStorage,
+        domain_storage: DomainStorage,
+        tombstone_storage: InboxTombstoneStorage,
+        create_concurrency: int = 8,
+        delete_concurrency: int = 8,
+        on_inboxes_deleted: Optional[Callable[[List[InboxRecord]], None]] = None
     ):
         self.email_delivery = email_delivery
         self.email_account_storage = email_account_storage
+        self.domain_storage = domain_storage
+        self.tombstone_storage = tombstone_storage
+        self.create_concurrency = create_concurrency
+        self.delete_concurrency = delete_concurrency
+        self.on_inboxes_deleted = on_inboxes_deleted
     
     def create_inbox(self, email: str) -> CreateInboxResult:
         logger.info(f"Creating inbox for {email}")
@@ -59,7 +110,7 @@ class InboxService(IInboxService):
         sub, apex = split_domain(domain)
 
         # Check that the domain exists
-        if not self.email_delivery.subdomain_exists(sub, apex):
+        if not self._domain_exists(sub, apex):
             raise ValueError(f"Subdomain {sub}.{apex} does not exist")
         
         # Create user
@@ -72,25 +123,185 @@ class InboxService(IInboxService):
             message="inbox created"
         )
     
+    def create_inboxes(self, emails: List[str]) -> List[BulkCreateInboxResult]:
+        """
+        Checks each domain once, creates the credentials concurrently and saves every
+        new account in one write. If the write fails the new credentials are deleted again
+        """
+        ordered = list(dict.fromkeys(emails))
+        results: Dict[str, BulkCreateInboxResult] = {}
+        
+        to_create = []
+        for email in ordered:
+            inbox_id = self.email_account_storage.get_inbox_id(email)
+            if inbox_id is not None:
+                results[email] = BulkCreateInboxResult(email=email, id=inbox_id, status="exists")
+            else:
+                to_create.append(email)
+        
+        logger.info(f"Creating {len(to_create)} inboxes, {len(ordered) - len(to_create)} already exist")
+        
+        with ThreadPoolExecutor(max_workers=self.create_concurrency, thread_name_prefix="create-inbox") as executor:
+            domains = list(dict.fromkeys(parse_email(email)[1] for email in to_create))
+            domain_errors = dict(zip(domains, executor.map(self._get_domain_error, domains)))
+            
+            creatable = []
+            for email in to_create:
+                _, domain = parse_email(email)
+                if domain_errors[domain]:
+                    results[email] = BulkCreateInboxResult(email=email, status="failed", error=domain_errors[domain])
+                else:
+                    creatable.append(email)
+            
+            created_errors = list(executor.map(self._create_user_error, creatable))
+        
+        created = [email for email, error in zip(creatable, created_errors) if error is None]
+        for email, error in zip(creatable, created_errors):
+            if error is not None:
+                results[email] = BulkCreateInboxResult(email=email, status="failed", error=error)
+        
+        inbox_ids: List[str] = []
+        save_error = "No account id returned"
+        if created:
+            try:
+                inbox_ids = self.email_account_storage.save_accounts(created)
+            except Exception as e:
+                logger.error(f"Failed to save {len(created)} new accounts: {e}")
+                save_error = f"Failed to save account: {e}"
+        
+        for email, inbox_id in zip(created, inbox_ids):
+            results[email] = BulkCreateInboxResult(email=email, id=inbox_id, status="created")
+        
+        # Credentials without a saved account could never be used or deleted through us, remove them again
+        unsaved = created[len(inbox_ids):]
+        if unsaved:
+            with ThreadPoolExecutor(max_workers=self.delete_concurrency, thread_name_prefix="create-inbox-rollback") as executor:
+                rollback_errors = list(executor.map(self._delete_user_error, unsaved))
+            
+            for email, rollback_error in zip(unsaved, rollback_errors):
+                error = save_error if rollback_error is None else f"{save_error}, credential left on the provider: {rollback_error}"
+                results[email] = BulkCreateInboxResult(email=email, status="failed", error=error)
+        
+        logger.info(f"Created {len(created) - len(unsaved)}/{len(to_create)} inboxes")
+        
+        return [results[email] for email in ordered]
+    
     def get_inbox(self, email: str) -> Optional[str]:
         return self.email_account_storage.get_inbox_id(email)
 
-    def list_inboxes(self, domain: Optional[str] = None) -> List[InboxRecord]:
-        return [
+    def list_inboxes(
+        self,
+        domain: Optional[str] = None,
+        after: Optional[int] = None,
+        limit: int = 100
+    ) -> InboxPage:
+        # One extra inbox tells whether there is a next page
+        accounts = list(islice(self.email_account_storage.iter_accounts(domain, after), limit + 1))
+        
+        inboxes = [
             InboxRecord(
-                inbox_id=inbox_id,
-                email=email
-            ) for inbox_id, email in self.email_account_storage.get_inboxes()
+                inbox_id=account.email_id,
+                email=account.email
+            ) for _, account in accounts[:limit]
         ]
+        
+        if len(accounts) > limit:
+            return InboxPage(inboxes=inboxes, next_position=accounts[limit - 1][0])
+        
+        return InboxPage(inboxes=inboxes)
+
+    def get_version(self) -> int:
+        return self.email_account_storage.get_version()
 
     def delete_inbox(self, inbox_id: str) -> bool:
-        email = self.email_account_storage.get_email_address(inbox_id)
+        result = self.delete_inboxes([inbox_id])[0]
+
+        if result.status == "failed":
+            logger.error(f"Failed to delete inbox id={inbox_id}: {result.error}")
+
+        return result.status == "deleted"
+
+    def delete_inboxes(self, inbox_ids: List[str]) -> List[BulkDeleteInboxResult]:
+        """
+        Deletes the provider credentials concurrently, then tombstones the accounts and their
+        stored mail in one write and evicts their cached services.
+        
+        Inboxes whose credential could not be deleted are kept, so the delete can be retried
+        """
+        ordered = list(dict.fromkeys(inbox_ids))
+        results: Dict[str, BulkDeleteInboxResult] = {}
+        
+        emails = {}
+        to_delete = []
+        for inbox_id in ordered:
+            email = self.email_account_storage.get_email_address(inbox_id)
+            if email is not None:
+                emails[inbox_id] = email
+                to_delete.append(inbox_id)
+            else:
+                results[inbox_id] = BulkDeleteInboxResult(inbox_id=inbox_id, status="not_found", error=f"No inbox found for id={inbox_id}")
+        
+        logger.info(f"Deleting {len(to_delete)} inboxes")
+        
+        with ThreadPoolExecutor(max_workers=self.delete_concurrency, thread_name_prefix="delete-inbox") as executor:
+            errors = list(executor.map(self._delete_user_error, [emails[inbox_id] for inbox_id in to_delete]))
+        
+        deleted = []
+        for inbox_id, error in zip(to_delete, errors):
+            if error is None:
+                deleted.append(InboxRecord(inbox_id=inbox_id, email=emails[inbox_id]))
+                results[inbox_id] = BulkDeleteInboxResult(inbox_id=inbox_id, email=emails[inbox_id], status="deleted")
+            else:
+                results[inbox_id] = BulkDeleteInboxResult(inbox_id=inbox_id, email=emails[inbox_id], status="failed", error=error)
+        
+        if deleted:
+            messages = self.tombstone_storage.delete_inboxes([(inbox.inbox_id, inbox.email) for inbox in deleted])
+            logger.info(f"Deleted {len(deleted)}/{len(to_delete)} inboxes and {messages} stored messages")
+            
+            if self.on_inboxes_deleted:
+                self.on_inboxes_deleted(deleted)
+        
+        return [results[inbox_id] for inbox_id in ordered]
 
+    def _get_domain_error(self, domain: str) -> Optional[str]:
+        sub, apex = split_domain(domain)
+        try:
+            if not self._domain_exists(sub, apex):
+                return f"Subdomain {sub}.{apex} does not exist"
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _create_user_error(self, email: str) -> Optional[str]:
+        local, domain = parse_email(email)
+        try:
+            if not self.email_delivery.create_user(local, domain):
+                return f"Failed to create user on {domain}"
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _delete_user_error(self, email: str) -> Optional[str]:
         local, domain = parse_email(email)
+        try:
+            if not self.email_delivery.delete_user(local, domain):
+                return f"Failed to delete user on {domain}"
+        except Exception as e:
+            return str(e)
+        return None
+
+    def _domain_exists(self, sub: str, apex: str) -> bool:
+        """
+        Domains in the registry are answered locally, only unknown ones ask the provider
+        """
+        registered = self.domain_storage.get_domain(f"{sub}.{apex}")
 
-        result = self.email_delivery.delete_user(local, domain)
+        if registered is not None and registered.status in ["pending", "verified"]:
+            return True
+        if registered is not None and registered.status == "deleted":
+            return False
 
-        return result
+        return self.email_delivery.subdomain_exists(sub, apex)
 
 
 def _create_user_email(local: str, domain: str, email_delivery: EmailDeliveryPort, email_account_storage: EmailAccountStorage) -> str:
@@ -1,14 +1,34 @@
 from .writer import StoragePort
 from .storage_manager import StorageManager
-from .inbox_storage import InboxStorage, InboxStorageManager
+from .inbox_storage import InboxStorage, InboxStorageManager, InboxIndex, InboxSchema, StoredEmail, EmailQuery, load_inbox_index
 from .email_account_storage import EmailAccountStorage
+from .inbox_tombstone_storage import InboxTombstoneStorage, InboxTombstoneSchema
+from .outbox_storage import OutboxStorage, OutboxSchema
+from .scheduled_email_storage import ScheduledEmailStorage, ScheduledEmailSchema
+from .domain_verification_storage import DomainVerificationStorage, DomainVerificationSchema
+from .domain_storage import DomainStorage, DomainSchema
 from .compose import compose_storage_manager
 
 __all__ = [
     'StoragePort',
     'InboxStorage',
     'InboxStorageManager',
+    'InboxIndex',
+    'load_inbox_index',
+    'InboxSchema',
+    'StoredEmail',
+    'EmailQuery',
     'StorageManager',
     'EmailAccountStorage',
+    'InboxTombstoneStorage',
+    'InboxTombstoneSchema',
+    'OutboxStorage',
+    'OutboxSchema',
+    'ScheduledEmailStorage',
+    'ScheduledEmailSchema',
+    'DomainVerificationStorage',
+    'DomainVerificationSchema',
+    'DomainStorage',
+    'DomainSchema',
     'compose_storage_manager'
 ]
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Registry of the domains we manage.
+
+Every state change is appended as a new row, the latest row for a domain is its current state.
+The current states are also kept in memory, so lookups never read the table.
+"""
+import threading
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from storage import StorageManager
+
+class DomainSchema(BaseModel):
+    domain: str
+    status: str # pending, verified, failed or deleted
+    dns_records: str # JSON list of the DNS records the domain needs
+    created_at: datetime
+    verified_at: Optional[datetime] = None
+    updated_at: datetime
+
+DOMAIN_TABLE_NAME = "domains"
+
+class DomainStorage:
+    def __init__(self, storage_manager: StorageManager):
+        self.storage_manager = storage_manager
+
+        self.storage_manager.create_table(DOMAIN_TABLE_NAME, DomainSchema)
+
+        self.domains: Dict[str, DomainSchema] = {}
+        self._lock = threading.Lock()
+
+        for entry in self.storage_manager.read_entries(DOMAIN_TABLE_NAME):
+            self.domains[entry.domain] = entry
+
+    def save_domain(self, domain: DomainSchema):
+        # Written under the lock so the table and memory agree on the latest row
+        with self._lock:
+            self.storage_manager.insert_entry(
+                DOMAIN_TABLE_NAME,
+                domain.model_dump()
+            )
+            self.domains[domain.domain] = domain
+
+    def save_domains(self, domains: List[DomainSchema]):
+        """
+        Records the current state of many domains in one write
+        """
+        if not domains:
+            return
+
+        with self._lock:
+            self.storage_manager.insert_entries(
+                DOMAIN_TABLE_NAME,
+                [domain.model_dump() for domain in domains]
+            )
+            for domain in domains:
+                self.domains[domain.domain] = domain
+
+    def get_domain(self, domain: str) -> Optional[DomainSchema]:
+        with self._lock:
+            entry = self.domains.get(domain)
+            return entry.model_copy() if entry else None
+
+    def get_domains(self, status: Optional[str] = None) -> List[DomainSchema]:
+        with self._lock:
+            return [
+                entry.model_copy() for entry in self.domains.values()
+                if status is None or entry.status == status
+            ]
@@ -0,0 +1,57 @@
+"""
+Durable record of domain verifications.
+
+Every status change is appended as a new row, the latest row for a domain is its current state
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from storage import StorageManager
+
+class DomainVerificationSchema(BaseModel):
+    domain: str
+    status: str # pending, verified, failed, expired or removed
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    last_attempt: datetime
+    updated_at: datetime
+
+DOMAIN_VERIFICATION_TABLE_NAME = "domain_verifications"
+
+class DomainVerificationStorage:
+    def __init__(self, storage_manager: StorageManager):
+        self.storage_manager = storage_manager
+
+        self.storage_manager.create_table(DOMAIN_VERIFICATION_TABLE_NAME, DomainVerificationSchema)
+
+    def save_verification(self, verification: DomainVerificationSchema):
+        self.storage_manager.insert_entry(
+            DOMAIN_VERIFICATION_TABLE_NAME,
+            verification.model_dump()
+        )
+
+    def save_verifications(self, verifications: List[DomainVerificationSchema]):
+        """
+        Records the current state of many domains in one write
+        """
+        if not verifications:
+            return
+
+        self.storage_manager.insert_entries(
+            DOMAIN_VERIFICATION_TABLE_NAME,
+            [verification.model_dump() for verification in verifications]
+        )
+
+    def get_latest_verifications(self) -> Dict[str, DomainVerificationSchema]:
+        """
+        Gets the current state of every domain, keyed by domain
+        """
+        latest: Dict[str, DomainVerificationSchema] = {}
+
+        for entry in self.storage_manager.read_entries(DOMAIN_VERIFICATION_TABLE_NAME):
+            latest[entry.domain] = entry
+
+        return latest
@@ -1,11 +1,20 @@
 """
 Used to save email accounts
+
+Accounts are small, so they are all kept in memory, indexed by id, by email and by domain.
+The table is only read once on startup.
 """
-from typing import Optional, List, Tuple
+import bisect
+import threading
+
+from typing import Dict, Iterator, Optional, List, Tuple, TYPE_CHECKING
 from pydantic import BaseModel
 
 from storage import StorageManager
 
+if TYPE_CHECKING:
+    from storage.inbox_tombstone_storage import InboxTombstoneStorage
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -16,58 +25,121 @@ class EmailAccountSchema(BaseModel):
 EMAIL_ACCOUNT_TABLE_NAME = "email_accounts"
 
 class EmailAccountStorage:
-    def __init__(self, storage_manager: StorageManager):
+    def __init__(
+        self,
+        storage_manager: StorageManager,
+        tombstone_storage: Optional["InboxTombstoneStorage"] = None
+    ):
         self.storage_manager = storage_manager
+        self.tombstone_storage = tombstone_storage
 
         self.storage_manager.create_table(
-            EMAIL_ACCOUNT_TABLE_NAME, 
+            EMAIL_ACCOUNT_TABLE_NAME,
             EmailAccountSchema,
             primary_id_column="email_id"
         )
 
+        self.accounts: Dict[str, EmailAccountSchema] = {}
+        self.inbox_ids: Dict[str, List[str]] = {}
+        # Positions and ids in creation order, overall and per domain
+        self.positions: List[int] = []
+        self.ordered_ids: List[str] = []
+        self.domain_positions: Dict[str, List[int]] = {}
+        self.domain_ids: Dict[str, List[str]] = {}
+        self.version = 0 # Moves forward on every write, not persisted
+        self._lock = threading.Lock()
+
+        for position, entry in self.storage_manager.iter_entries(EMAIL_ACCOUNT_TABLE_NAME):
+            self._add(position, entry)
+
     def save_account(self, email: str) -> str:
         """
         Returns a unique id for the email
         """
-        result = self.storage_manager.insert_entry(
-            EMAIL_ACCOUNT_TABLE_NAME,
-            {
-                "email": email
-            }
-        )
+        return self.save_accounts([email])[0]
 
-        return result.email_id
+    def save_accounts(self, emails: List[str]) -> List[str]:
+        """
+        Saves many accounts in one write, returns their ids in the same order
+        """
+        # Written under the lock so the index stays in position order
+        with self._lock:
+            results = self.storage_manager.append_entries(
+                EMAIL_ACCOUNT_TABLE_NAME,
+                [{"email": email} for email in emails]
+            )
+            for position, entry in results:
+                self._add(position, entry)
+            self.version += 1
+
+        return [entry.email_id for _, entry in results]
+
+    def get_version(self) -> int:
+        """
+        Changes whenever an account is saved or deleted
+        """
+        # Both counters only increase, so their sum does too
+        deleted_version = self.tombstone_storage.version if self.tombstone_storage is not None else 0
+        return self.version + deleted_version
 
     def get_inboxes(self) -> List[Tuple[str, str]]:
-        entries = self.storage_manager.read_entries(EMAIL_ACCOUNT_TABLE_NAME)
-        return [(entry.email_id, entry.email) for entry in entries]
+        return [(entry.email_id, entry.email) for _, entry in self.iter_accounts()]
 
-    def get_email_address(self, inbox_id: str) -> str:
-        entries = self.storage_manager.get_entry(
-            EMAIL_ACCOUNT_TABLE_NAME,
-            "email_id",
-            inbox_id
-        )
-        
-        if len(entries) == 0:
+    def iter_accounts(
+        self,
+        domain: Optional[str] = None,
+        after: Optional[int] = None
+    ) -> Iterator[Tuple[int, EmailAccountSchema]]:
+        """
+        Yields (position, account) in creation order, only on the domain if given,
+        starting after the given position
+        """
+        with self._lock:
+            if domain is None:
+                positions, ids = self.positions, self.ordered_ids
+            else:
+                positions = self.domain_positions.get(domain.lower(), [])
+                ids = self.domain_ids.get(domain.lower(), [])
+
+            start = 0 if after is None else bisect.bisect_right(positions, after)
+            # The lists are only appended to, so this prefix is stable
+            end = len(positions)
+
+        for i in range(start, end):
+            if self._is_deleted(ids[i]):
+                continue
+            yield positions[i], self.accounts[ids[i]]
+
+    def get_email_address(self, inbox_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self.accounts.get(inbox_id)
+
+        if entry is None or self._is_deleted(inbox_id):
             return None
 
-        if len(entries) > 1:
-            logger.warn(f"Multiple ids for {inbox_id} found, amount={len(entries)}")
-
-        return entries[0].email
+        return entry.email
 
     def get_inbox_id(self, email: str) -> Optional[str]:
-        entries = self.storage_manager.get_entry(
-            EMAIL_ACCOUNT_TABLE_NAME,
-            "email",
-            email
-        )
+        with self._lock:
+            inbox_ids = [inbox_id for inbox_id in self.inbox_ids.get(email, []) if not self._is_deleted(inbox_id)]
 
-        if len(entries) == 0:
+        if len(inbox_ids) == 0:
             return None
 
-        if len(entries) > 1:
-            logger.warn(f"Multiple ids for {email} found, amount={len(entries)}")
+        if len(inbox_ids) > 1:
+            logger.warn(f"Multiple ids for {email} found, amount={len(inbox_ids)}")
+
+        return inbox_ids[0]
+
+    def _add(self, position: int, entry: EmailAccountSchema):
+        domain = entry.email.rsplit("@", 1)[-1].lower()
+
+        self.accounts[entry.email_id] = entry
+        self.inbox_ids.setdefault(entry.email, []).append(entry.email_id)
+        self.positions.append(position)
+        self.ordered_ids.append(entry.email_id)
+        self.domain_positions.setdefault(domain, []).append(position)
+        self.domain_ids.setdefault(domain, []).append(entry.email_id)
 
-        return entries[0].email_id
\ No newline at end of file
+    def _is_deleted(self, inbox_id: str) -> bool:
+        return self.tombstone_storage is not None and self.tombstone_storage.is_account_deleted(inbox_id)
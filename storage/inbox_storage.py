@@ -1,14 +1,24 @@
 """
 This is the persistance layer of the inbox storage
+
+Every inbox's messages are indexed in memory by their position in the table, along with the
+fields they can be filtered on. Queries are answered from the index and only the matching
+rows are read back from the table.
 """
 
+import bisect
+import threading
+
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
 
 from pydantic import BaseModel
 
 from storage import StorageManager
 
+if TYPE_CHECKING:
+    from storage.inbox_tombstone_storage import InboxTombstoneStorage
+
 class InboxSchema(BaseModel):
     inbox_id: str # Key for the inbox to associate this with
     message_id: str # Unique id created for this message
@@ -19,28 +29,143 @@ class InboxSchema(BaseModel):
     timestamp: datetime
     reply_id: Optional[str] = None # Optional reference of who the email is replying to
 
+class StoredEmail(InboxSchema):
+    position: int # Where the row is stored, increases in arrival order
+    thread_id: str # message_id of the first email of the thread
+
+class EmailQuery(BaseModel):
+    since: Optional[datetime] = None
+    from_email: Optional[str] = None # Matches anywhere in the From header, ignoring case
+    to_email: Optional[str] = None # Matches anywhere in the To header, ignoring case
+    thread_id: Optional[str] = None
+    unread: Optional[bool] = None # Read state is not tracked yet, every stored email is unread
+
+class IndexedEmail(BaseModel):
+    position: int
+    message_id: str
+    from_email: str # Lower cased
+    to_email: str # Lower cased
+    timestamp: datetime # Timezone aware
+    thread_id: str
+
 INBOX_TABLE_NAME = "inbox"
 
+class InboxIndex:
+    """
+    Per inbox, the indexed emails in position order. Lists are only ever appended to,
+    so readers can walk a prefix of them without holding the lock.
+
+    Every change to an inbox moves its version forward, versions are not persisted.
+    """
+    def __init__(self):
+        self.emails: Dict[str, List[IndexedEmail]] = {}
+        self.positions: Dict[str, List[int]] = {}
+        self.threads: Dict[str, Dict[str, str]] = {}
+        self.versions: Dict[str, int] = {}
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def add(self, position: int, email: InboxSchema):
+        # Replies join the thread of the email they reply to
+        threads = self.threads.setdefault(email.inbox_id, {})
+        thread_id = threads.get(email.reply_id, email.reply_id) if email.reply_id else email.message_id
+        threads.setdefault(email.message_id, thread_id)
+
+        self.emails.setdefault(email.inbox_id, []).append(IndexedEmail(
+            position=position,
+            message_id=email.message_id,
+            from_email=email.from_email.lower(),
+            to_email=email.to_email.lower(),
+            timestamp=_as_aware(email.timestamp),
+            thread_id=thread_id
+        ))
+        self.positions.setdefault(email.inbox_id, []).append(position)
+        self._bump(email.inbox_id)
+
+    def remove(self, inbox_id: str):
+        with self.lock:
+            self.emails.pop(inbox_id, None)
+            self.positions.pop(inbox_id, None)
+            self.threads.pop(inbox_id, None)
+            self._bump(inbox_id)
+
+    def get_version(self, inbox_id: str) -> int:
+        with self.lock:
+            return self.versions.get(inbox_id, 0)
+
+    def _bump(self, inbox_id: str):
+        # A shared counter keeps an inbox's version increasing even after it was removed
+        self.counter += 1
+        self.versions[inbox_id] = self.counter
+
+    def after(self, inbox_id: str, position: Optional[int]) -> Iterator[IndexedEmail]:
+        with self.lock:
+            emails = self.emails.get(inbox_id, [])
+            positions = self.positions.get(inbox_id, [])
+            start = 0 if position is None else bisect.bisect_right(positions, position)
+            end = len(emails)
+
+        # Walked in place rather than copied, emails added meanwhile are left for the next call
+        for i in range(start, end):
+            yield emails[i]
+
+
+def load_inbox_index(storage_manager: StorageManager) -> InboxIndex:
+    """
+    Builds the index of every email in the inbox table
+    """
+    storage_manager.create_table(INBOX_TABLE_NAME, InboxSchema)
+
+    index = InboxIndex()
+    for position, entry in storage_manager.iter_entries(INBOX_TABLE_NAME):
+        index.add(position, entry)
+
+    return index
+
+
 class InboxStorageManager:
-    def __init__(self, storage_manager: StorageManager):
+    def __init__(
+        self,
+        storage_manager: StorageManager,
+        tombstone_storage: Optional["InboxTombstoneStorage"] = None,
+        index: Optional[InboxIndex] = None
+    ):
         self.storage_manager = storage_manager
+        self.tombstone_storage = tombstone_storage
 
         self.storages: Dict[str, 'InboxStorage'] = {}
 
+        self.storage_manager.create_table(INBOX_TABLE_NAME, InboxSchema)
+
+        self.index = index if index is not None else load_inbox_index(storage_manager)
+
     def get_or_create_inbox_storage(self, inbox_id: str):
         if inbox_id not in self.storages:
-            self.storages[inbox_id] = InboxStorage(inbox_id, self.storage_manager)
+            self.storages[inbox_id] = InboxStorage(inbox_id, self.storage_manager, self.tombstone_storage, self.index)
 
         return self.storages[inbox_id]
 
+    def evict(self, inbox_id: str):
+        self.storages.pop(inbox_id, None)
+        self.index.remove(inbox_id)
+
 
 class InboxStorage:
-    def __init__(self, inbox_id: str, storage_manager: StorageManager):
+    def __init__(
+        self,
+        inbox_id: str,
+        storage_manager: StorageManager,
+        tombstone_storage: Optional["InboxTombstoneStorage"] = None,
+        index: Optional[InboxIndex] = None
+    ):
         self.inbox_id = inbox_id
         self.storage_manager = storage_manager
+        self.tombstone_storage = tombstone_storage
 
         self.storage_manager.create_table(INBOX_TABLE_NAME, InboxSchema)
 
+        self.index = index if index is not None else load_inbox_index(storage_manager)
+
     def save_email(
         self,
         message_id: str,
@@ -51,8 +176,7 @@ class InboxStorage:
         timestamp: datetime,
         reply_id: Optional[str] = None
     ):
-        self.storage_manager.insert_entry(
-            INBOX_TABLE_NAME,
+        self.save_emails([
             InboxSchema(
                 inbox_id=self.inbox_id,
                 message_id=message_id,
@@ -62,8 +186,85 @@ class InboxStorage:
                 body=body,
                 timestamp=timestamp,
                 reply_id=reply_id
-            ).model_dump()
+            )
+        ])
+
+    def save_emails(self, emails: List[InboxSchema]):
+        """
+        Saves many emails to this inbox with a single storage write
+        """
+        # Written under the index lock so the index stays in position order
+        with self.index.lock:
+            stored = self.storage_manager.append_entries(
+                INBOX_TABLE_NAME,
+                [
+                    email.model_copy(update={"inbox_id": self.inbox_id}).model_dump()
+                    for email in emails
+                ]
+            )
+            for position, entry in stored:
+                self.index.add(position, entry)
+
+    def get_version(self) -> int:
+        """
+        Changes whenever an email is saved to this inbox
+        """
+        return self.index.get_version(self.inbox_id)
+
+    def get_emails(self) -> List[StoredEmail]:
+        return list(self.iter_emails(EmailQuery()))
+
+    def iter_emails(
+        self,
+        query: EmailQuery,
+        after: Optional[int] = None,
+        batch_size: int = 100
+    ) -> Iterator[StoredEmail]:
+        """
+        Yields the emails matching the query in arrival order, starting after the given position.
+
+        The filters are evaluated on the index, matching rows are read batch_size at a time
+        """
+        matches: List[IndexedEmail] = []
+
+        for indexed in self.index.after(self.inbox_id, after):
+            if not self._matches(indexed, query):
+                continue
+
+            matches.append(indexed)
+            if len(matches) >= batch_size:
+                yield from self._read(matches)
+                matches = []
+
+        yield from self._read(matches)
+
+    def _matches(self, indexed: IndexedEmail, query: EmailQuery) -> bool:
+        if self.tombstone_storage is not None and self.tombstone_storage.is_message_deleted(self.inbox_id, indexed.message_id):
+            return False
+        if query.unread is False:
+            return False
+        if query.since is not None and indexed.timestamp < _as_aware(query.since):
+            return False
+        if query.from_email is not None and query.from_email.lower() not in indexed.from_email:
+            return False
+        if query.to_email is not None and query.to_email.lower() not in indexed.to_email:
+            return False
+        if query.thread_id is not None and indexed.thread_id != query.thread_id:
+            return False
+        return True
+
+    def _read(self, indexed: List[IndexedEmail]) -> List[StoredEmail]:
+        entries = self.storage_manager.read_entries_at(
+            INBOX_TABLE_NAME,
+            [email.position for email in indexed]
         )
 
-    def get_emails(self) -> List[InboxSchema]:
-        return self.storage_manager.read_entries(INBOX_TABLE_NAME)
+        return [
+            StoredEmail(**entry.model_dump(), position=email.position, thread_id=email.thread_id)
+            for email, entry in zip(indexed, entries)
+        ]
+
+
+def _as_aware(timestamp: datetime) -> datetime:
+    # Naive timestamps were stored in local time
+    return timestamp if timestamp.tzinfo is not None else timestamp.astimezone()
@@ -0,0 +1,99 @@
+"""
+Tombstones of deleted inboxes.
+
+Tables are append-only, so deleting an inbox appends a row for the account and one for each
+of its stored messages, all in one write. The account and inbox storages skip tombstoned rows.
+
+The messages to tombstone are taken from the inbox index, under its lock, so an email saved
+while an inbox is being deleted is either tombstoned or arrives after the deletion.
+"""
+import threading
+
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from storage import StorageManager
+from storage.inbox_storage import InboxIndex, load_inbox_index
+
+class InboxTombstoneSchema(BaseModel):
+    inbox_id: str # id of the deleted email account
+    email: str
+    message_id: Optional[str] = None # Set for the account's messages, None for the account itself
+    deleted_at: datetime
+
+INBOX_TOMBSTONE_TABLE_NAME = "inbox_tombstones"
+
+class InboxTombstoneStorage:
+    def __init__(self, storage_manager: StorageManager, index: Optional[InboxIndex] = None):
+        self.storage_manager = storage_manager
+        # Should be the index the inbox storages write to, or deletions miss their newer emails
+        self.index = index if index is not None else load_inbox_index(storage_manager)
+
+        self.storage_manager.create_table(INBOX_TOMBSTONE_TABLE_NAME, InboxTombstoneSchema)
+
+        self.deleted_accounts: Set[str] = set()
+        self.deleted_messages: Set[Tuple[str, str]] = set()
+        self.version = 0 # Moves forward on every deletion
+        self._lock = threading.Lock()
+
+        for entry in self.storage_manager.read_entries(INBOX_TOMBSTONE_TABLE_NAME):
+            self._add(entry)
+
+    def delete_inboxes(self, inboxes: List[Tuple[str, str]]) -> int:
+        """
+        Tombstones the (inbox_id, email) accounts and every message stored for them in one write.
+
+        Returns the number of messages tombstoned
+        """
+        if not inboxes:
+            return 0
+
+        now = datetime.now()
+
+        tombstones = [
+            InboxTombstoneSchema(inbox_id=inbox_id, email=email, deleted_at=now)
+            for inbox_id, email in inboxes
+        ]
+
+        # Held until the tombstones are written, so no email can be saved to these inboxes in between
+        with self.index.lock:
+            # Messages are stored under the inbox's email
+            seen = set()
+            for inbox_id, email in inboxes:
+                for indexed in self.index.emails.get(email, []):
+                    key = (email, indexed.message_id)
+                    if key in seen or key in self.deleted_messages:
+                        continue
+
+                    seen.add(key)
+                    tombstones.append(InboxTombstoneSchema(
+                        inbox_id=inbox_id,
+                        email=email,
+                        message_id=indexed.message_id,
+                        deleted_at=now
+                    ))
+
+            with self._lock:
+                self.storage_manager.insert_entries(
+                    INBOX_TOMBSTONE_TABLE_NAME,
+                    [tombstone.model_dump() for tombstone in tombstones]
+                )
+                for tombstone in tombstones:
+                    self._add(tombstone)
+                self.version += 1
+
+        return len(seen)
+
+    def is_account_deleted(self, inbox_id: str) -> bool:
+        return inbox_id in self.deleted_accounts
+
+    def is_message_deleted(self, email: str, message_id: str) -> bool:
+        return (email, message_id) in self.deleted_messages
+
+    def _add(self, tombstone: InboxTombstoneSchema):
+        if tombstone.message_id is None:
+            self.deleted_accounts.add(tombstone.inbox_id)
+        else:
+            self.deleted_messages.add((tombstone.email, tombstone.message_id))
@@ -0,0 +1,101 @@
+"""
+Durable record of outbound emails.
+
+Every status change is appended as a new row, the latest row for a message_id is its current state.
+The position and status of every latest row are kept in memory, so only the rows asked for are read.
+"""
+import threading
+
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+from storage import StorageManager
+
+import logging
+logger = logging.getLogger(__name__)
+
+class OutboxSchema(BaseModel):
+    message_id: str # Handle returned to the caller
+    inbox_id: str
+    from_email: str
+    recipients: str # JSON list of the recipients, several for a batch
+    subject: str
+    body: str
+    status: str # pending, sending, sent, failed or unknown
+    attempts: int
+    provider_message_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+OUTBOX_TABLE_NAME = "outbox"
+
+UNFINISHED_STATUSES = ("pending", "sending")
+
+class OutboxStorage:
+    def __init__(self, storage_manager: StorageManager):
+        self.storage_manager = storage_manager
+
+        self.storage_manager.create_table(OUTBOX_TABLE_NAME, OutboxSchema)
+
+        # Position and status of the latest row of every message
+        self.positions: Dict[str, int] = {}
+        self.statuses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        for position, entry in self.storage_manager.iter_entries(OUTBOX_TABLE_NAME):
+            self._add(position, entry)
+
+    def save_message(self, message: OutboxSchema):
+        """
+        Records the current state of the message
+        """
+        self.save_messages([message])
+
+    def save_messages(self, messages: List[OutboxSchema]):
+        """
+        Records the current state of many messages in one write
+        """
+        if not messages:
+            return
+
+        # Written under the lock so the index keeps the latest position of every message
+        with self._lock:
+            results = self.storage_manager.append_entries(
+                OUTBOX_TABLE_NAME,
+                [message.model_dump() for message in messages]
+            )
+            for position, entry in results:
+                self._add(position, entry)
+
+    def get_message(self, message_id: str) -> Optional[OutboxSchema]:
+        with self._lock:
+            position = self.positions.get(message_id)
+
+        if position is None:
+            return None
+
+        return self.storage_manager.read_entries_at(OUTBOX_TABLE_NAME, [position])[0]
+
+    def get_message_ids(self) -> Set[str]:
+        with self._lock:
+            return set(self.positions)
+
+    def get_unfinished_messages(self) -> List[OutboxSchema]:
+        """
+        Gets all messages whose latest state is pending or sending
+        """
+        with self._lock:
+            positions = sorted(
+                self.positions[message_id]
+                for message_id, status in self.statuses.items()
+                if status in UNFINISHED_STATUSES
+            )
+
+        return self.storage_manager.read_entries_at(OUTBOX_TABLE_NAME, positions)
+
+    def _add(self, position: int, entry: OutboxSchema):
+        self.positions[entry.message_id] = position
+        self.statuses[entry.message_id] = entry.status
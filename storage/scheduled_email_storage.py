@@ -0,0 +1,58 @@
+"""
+Durable record of emails scheduled to be sent later.
+
+Every status change is appended as a new row, the latest row for a schedule_id is its current state
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from storage import StorageManager
+
+class ScheduledEmailSchema(BaseModel):
+    schedule_id: str # Becomes the outbound message_id once dispatched
+    inbox_id: str
+    to_email: str
+    subject: str
+    body: str
+    send_at: datetime
+    status: str # scheduled, dispatched or failed
+    created_at: datetime
+
+SCHEDULED_EMAIL_TABLE_NAME = "scheduled_emails"
+
+class ScheduledEmailStorage:
+    def __init__(self, storage_manager: StorageManager):
+        self.storage_manager = storage_manager
+
+        self.storage_manager.create_table(SCHEDULED_EMAIL_TABLE_NAME, ScheduledEmailSchema)
+
+    def save_scheduled_email(self, scheduled_email: ScheduledEmailSchema):
+        self.storage_manager.insert_entry(
+            SCHEDULED_EMAIL_TABLE_NAME,
+            scheduled_email.model_dump()
+        )
+
+    def save_scheduled_emails(self, scheduled_emails: List[ScheduledEmailSchema]):
+        """
+        Records the current state of many scheduled emails in one write
+        """
+        self.storage_manager.insert_entries(
+            SCHEDULED_EMAIL_TABLE_NAME,
+            [scheduled_email.model_dump() for scheduled_email in scheduled_emails]
+        )
+
+    def get_pending_scheduled_emails(self) -> List[ScheduledEmailSchema]:
+        """
+        Gets all emails whose latest state is still scheduled
+        """
+        latest: Dict[str, ScheduledEmailSchema] = {}
+
+        for entry in self.storage_manager.read_entries(SCHEDULED_EMAIL_TABLE_NAME):
+            latest[entry.schedule_id] = entry
+
+        return [
+            entry for entry in latest.values()
+            if entry.status == "scheduled"
+        ]
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Type, Optional
+from typing import Dict, Iterator, List, Any, Tuple, Type, Optional
 from pydantic import BaseModel
 
 from storage.table import Table, build_table, TableConfig
@@ -49,6 +49,24 @@ class StorageManager:
 
         return inserted_result
 
+
+    def insert_entries(self, table_name: str, entries: List[Dict[str, Any]]) -> List[BaseModel]:
+        if table_name not in self.tables:
+            return []
+        
+        table = self.tables[table_name]
+        
+        return table.insert_entries(entries)
+
+
+    def append_entries(self, table_name: str, entries: List[Dict[str, Any]]) -> List[Tuple[int, BaseModel]]:
+        """
+        Inserts the entries in one write, returning (position, entry) pairs so callers can index them
+        """
+        table = self._get_table(table_name)
+
+        return table.append_entries(entries)
+
     
     def read_entries(self, table_name: str) -> List[Type[BaseModel]]:
         table = self._get_table(table_name)
@@ -56,6 +74,21 @@ class StorageManager:
         return table.read_entries()
 
 
+    def iter_entries(self, table_name: str) -> Iterator[Tuple[int, BaseModel]]:
+        table = self._get_table(table_name)
+
+        return table.iter_entries()
+
+
+    def read_entries_at(self, table_name: str, positions: List[int]) -> List[BaseModel]:
+        """
+        Reads only the rows at the given positions, as returned by append_entries or iter_entries
+        """
+        table = self._get_table(table_name)
+
+        return table.read_entries_at(positions)
+
+
     def get_entry(self, table: str, column: str, value: Any) -> List[BaseModel]:
         """
         Given a column and value, gets all records that match
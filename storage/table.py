@@ -1,7 +1,7 @@
 from storage.writer import compose, STORAGE_OPTIONS
 from storage.writer import SUPPORTED_TYPES
 
-from typing import Any, List, Type, Optional, get_origin, get_args, Union
+from typing import Any, Iterator, List, Tuple, Type, Optional, get_origin, get_args, Union
 from pydantic import BaseModel
 
 import uuid
@@ -36,6 +36,33 @@ class Table:
         Validate and insert entry into the table.
         Pydantic will enforce types and coerce values where possible.
         """
+        model_instance = self._build_entry(data)
+        self.storage.insert_entry(self.table_name, model_instance.model_dump())
+
+        return model_instance
+
+    def insert_entries(self, entries: List[dict[str, Any]]) -> List[BaseModel]:
+        """
+        Validate and insert many entries into the table in one storage write.
+        """
+        return [model_instance for _, model_instance in self.append_entries(entries)]
+
+    def append_entries(self, entries: List[dict[str, Any]]) -> List[Tuple[int, BaseModel]]:
+        """
+        Like insert_entries, also returning the position each entry was stored at.
+        """
+        model_instances = [self._build_entry(data) for data in entries]
+        positions = self.storage.insert_entries(
+            self.table_name,
+            [model_instance.model_dump() for model_instance in model_instances]
+        )
+
+        return list(zip(positions, model_instances))
+
+    def _build_entry(self, data: dict[str, Any]) -> BaseModel:
+        """
+        Fill in the primary id if needed and validate the entry against the schema.
+        """
         if self.table_config.primary_id_column is not None:
             col = self.table_config.primary_id_column
             if col not in data or data[col] is None:
@@ -50,10 +77,7 @@ class Table:
 
                 data[col] = unique_id
 
-        model_instance = self.schema(**data)  # validate and cast
-        self.storage.insert_entry(self.table_name, model_instance.model_dump())
-
-        return model_instance
+        return self.schema(**data)  # validate and cast
 
     def read_entries(self) -> List[BaseModel]:
         """
@@ -62,6 +86,20 @@ class Table:
         rows = self.storage.read_entries(self.table_name)
         return [self.schema(**row) for row in rows]
 
+    def iter_entries(self) -> Iterator[Tuple[int, BaseModel]]:
+        """
+        Stream (position, entry) pairs without holding the whole table in memory.
+        """
+        for position, row in self.storage.iter_entries(self.table_name):
+            yield position, self.schema(**row)
+
+    def read_entries_at(self, positions: List[int]) -> List[BaseModel]:
+        """
+        Read and validate only the rows at the given positions.
+        """
+        rows = self.storage.read_entries_at(self.table_name, positions)
+        return [self.schema(**row) for row in rows]
+
 
 def _validate_schema(schema: Type[BaseModel]):
     """
@@ -1,11 +1,17 @@
 from .storage_port import StoragePort, SUPPORTED_TYPES
 
-from typing import Dict, List, Tuple, Optional, Union, get_origin, get_args
+from typing import Dict, Iterator, List, Tuple, Optional, Union, get_origin, get_args
 from datetime import datetime
+import threading
+import locale
 import types
+import io
 import os
 import csv
 
+# Files are opened in text mode with the default encoding, rows are located by byte offset
+_ENCODING = locale.getpreferredencoding(False)
+
 
 class CSVStorage(StoragePort):
     def __init__(self, folder_loc: str):
@@ -13,6 +19,7 @@ class CSVStorage(StoragePort):
         os.makedirs(folder_loc, exist_ok=True)
         
         self.files: Dict[str, str] = {}
+        self._write_lock = threading.Lock()
 
     def create_table(self, table_name: str, schema: Dict[str, object]):
         """
@@ -80,49 +87,144 @@ class CSVStorage(StoragePort):
                 base_typ, is_optional = _normalize_annotation(ann)
                 f.write(f"{col}:{_format_schema_type(base_typ, is_optional)}\n")
 
-    def insert_entry(self, table_name: str, entry: Dict[str, SUPPORTED_TYPES]):
+    def insert_entry(self, table_name: str, entry: Dict[str, SUPPORTED_TYPES]) -> int:
+        """
+        Insert a new row into the CSV table, returns the position of the row.
         """
-        Insert a new row into the CSV table.
+        return self.insert_entries(table_name, [entry])[0]
+
+    def insert_entries(self, table_name: str, entries: List[Dict[str, SUPPORTED_TYPES]]) -> List[int]:
         """
+        Insert many rows into the CSV table with a single write.
+        Returns the position of each row, which read_entries_at accepts.
+        """
+        if not entries:
+            return []
+
         file_path = self.files[table_name]
 
         if not _does_file_exist(file_path):
             raise FileNotFoundError(f"Table '{table_name}' does not exist.")
 
-        with open(file_path, mode="a", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=entry.keys())
+        rows = []
+        for entry in entries:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=entry.keys())
             writer.writerow({k: _serialize_value(v) for k, v in entry.items()})
+            rows.append(buffer.getvalue())
+
+        # Rows from concurrent writers must not interleave
+        with self._write_lock, open(file_path, mode="ab") as file:
+            position = file.seek(0, os.SEEK_END)
+            data = [row.encode(_ENCODING) for row in rows]
+            file.write(b"".join(data))
+
+        positions = []
+        for row in data:
+            positions.append(position)
+            position += len(row)
+
+        return positions
 
     def read_entries(self, table_name: str) -> List[Dict[str, SUPPORTED_TYPES]]:
         """
         Read all rows from the CSV table as list of dicts.
         Restores types using the stored schema if available.
         """
+        return [row for _, row in self.iter_entries(table_name)]
+
+    def iter_entries(self, table_name: str) -> Iterator[Tuple[int, Dict[str, SUPPORTED_TYPES]]]:
+        """
+        Yields (position, row) for every row of the CSV table, reading the file as it goes.
+        """
+        file_path = self._get_file_path(table_name)
+        schema_info = _load_schema_info(file_path)
+
+        with open(file_path, mode="rb") as file:
+            reader = _PositionedReader(file)
+            header = reader.read_row()
+            if header is None:
+                return
+
+            while True:
+                position = reader.position
+                row = reader.read_row()
+                if row is None:
+                    return
+                if not row:
+                    continue  # Blank lines hold no row
+                yield position, _decode_row(dict(zip(header, row)), schema_info)
+
+    def read_entries_at(self, table_name: str, positions: List[int]) -> List[Dict[str, SUPPORTED_TYPES]]:
+        """
+        Reads only the rows at the given positions, in the order given.
+        """
+        if not positions:
+            return []
+
+        file_path = self._get_file_path(table_name)
+        schema_info = _load_schema_info(file_path)
+
+        with open(file_path, mode="rb") as file:
+            header = _PositionedReader(file).read_row()
+
+            rows = []
+            for position in positions:
+                file.seek(position)
+                row = _PositionedReader(file).read_row()
+                if row is None:
+                    raise ValueError(f"No row at position={position} in table {table_name}")
+                rows.append(_decode_row(dict(zip(header, row)), schema_info))
+
+            return rows
+
+    def _get_file_path(self, table_name: str) -> str:
         file_path = self.files[table_name]
 
         if not _does_file_exist(file_path):
             raise FileNotFoundError(f"Table {table_name} does not exist.")
 
-        # Try to load schema
-        schema_path = file_path + ".schema"
-        schema_info: Dict[str, Tuple[type, bool]] = {}
-        if os.path.exists(schema_path):
-            with open(schema_path) as f:
-                for line in f:
-                    col, typ_name = line.strip().split(":")
-                    schema_info[col] = _parse_schema_type(typ_name)
+        return file_path
 
-        with open(file_path, mode="r", newline="") as file:
-            reader = csv.DictReader(file)
-            rows = []
-            for row in reader:
-                if schema_info:
-                    rows.append({
-                        k: _deserialize_value(v, *(schema_info.get(k, (str, False)))) for k, v in row.items()
-                    })
-                else:
-                    rows.append(row)  # raw strings if no schema
-            return rows
+
+class _PositionedReader:
+    """
+    Reads CSV records from a binary file while tracking the byte offset of the next record.
+    The csv reader only pulls further lines for quoted fields spanning several lines.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.position = file.tell()
+        self.reader = csv.reader(self._lines())
+
+    def _lines(self) -> Iterator[str]:
+        for line in iter(self.file.readline, b""):
+            self.position += len(line)
+            yield line.decode(_ENCODING)
+
+    def read_row(self) -> Optional[List[str]]:
+        return next(self.reader, None)
+
+
+def _load_schema_info(file_path: str) -> Dict[str, Tuple[type, bool]]:
+    schema_path = file_path + ".schema"
+    schema_info: Dict[str, Tuple[type, bool]] = {}
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            for line in f:
+                col, typ_name = line.strip().split(":")
+                schema_info[col] = _parse_schema_type(typ_name)
+
+    return schema_info
+
+
+def _decode_row(row: Dict[str, str], schema_info: Dict[str, Tuple[type, bool]]) -> Dict[str, SUPPORTED_TYPES]:
+    if not schema_info:
+        return row  # raw strings if no schema
+
+    return {
+        k: _deserialize_value(v, *(schema_info.get(k, (str, False)))) for k, v in row.items()
+    }
 
 
 def _does_file_exist(file_path: str) -> bool:
@@ -3,12 +3,16 @@ Abstraction upon different storage interfaces
 """
 
 from datetime import datetime
-from typing import Protocol, Dict, List
+from typing import Protocol, Dict, Iterator, List, Tuple
 
 # Include None in supported runtime values so storages can return Optional[T]
 SUPPORTED_TYPES = int | float | str | bool | datetime | None
 
 class StoragePort(Protocol):
     def create_table(self, table_name: str, table: Dict[str, object]): ...
-    def insert_entry(self, table_name: str, table: Dict[str, SUPPORTED_TYPES]): ...
+    def insert_entry(self, table_name: str, table: Dict[str, SUPPORTED_TYPES]) -> int: ...
+    def insert_entries(self, table_name: str, entries: List[Dict[str, SUPPORTED_TYPES]]) -> List[int]: ...
     def read_entries(self, table_name: str) -> List[Dict[str, SUPPORTED_TYPES]]: ...
+    # Positions are opaque, increasing in insertion order and stable for the life of the row
+    def iter_entries(self, table_name: str) -> Iterator[Tuple[int, Dict[str, SUPPORTED_TYPES]]]: ...
+    def read_entries_at(self, table_name: str, positions: List[int]) -> List[Dict[str, SUPPORTED_TYPES]]: ...
@@ -0,0 +1,24 @@
+import base64
+import binascii
+
+# Cursors are opaque to clients, the version prefix lets the format change later
+CURSOR_VERSION = "v1"
+
+def encode_cursor(value: str) -> str:
+    raw = f"{CURSOR_VERSION}:{value}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Returns the value the cursor was encoded from, raises ValueError if it is not a valid cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+    version, _, value = raw.partition(":")
+    if version != CURSOR_VERSION:
+        raise ValueError("Invalid cursor")
+
+    return value
@@ -0,0 +1,20 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def build_pooled_session(pool_size: int = 10) -> requests.Session:
+    """
+    Build a keep-alive session that reuses up to `pool_size` connections per host,
+    avoiding a new TCP/TLS handshake for every request.
+    """
+    session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        pool_block=False
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
@@ -0,0 +1,158 @@
+"""
+Generates signed Mailgun inbound webhooks against a running server, for load testing.
+
+    python -m util.inbound_webhook_generator --recipient agent@demo.example.com --count 1000
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import statistics
+import threading
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from util.http_session import build_pooled_session
+
+DEFAULT_WEBHOOK_URL = "http://127.0.0.1:8000/mailgun/webhooks/inbound"
+
+
+class InboundLoadResult(BaseModel):
+    sent: int
+    succeeded: int
+    failed: int
+    duration_seconds: float
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+
+
+def build_signed_inbound_payload(
+    signing_key: str,
+    sender: str,
+    recipient: str,
+    subject: str,
+    body: str,
+    reply_id: str = ""
+) -> Dict[str, str]:
+    """
+    Builds the form fields of a Mailgun inbound route forward, signed like Mailgun does
+    """
+    timestamp = str(int(time.time()))
+    token = uuid.uuid4().hex
+    signature = hmac.new(
+        signing_key.encode("utf-8"),
+        msg=f"{timestamp}{token}".encode("utf-8"),
+        digestmod=hashlib.sha256
+    ).hexdigest()
+
+    return {
+        "token": token,
+        "timestamp": timestamp,
+        "signature": signature,
+        "From": sender,
+        "To": recipient,
+        "Message-Id": f"<{uuid.uuid4().hex}@loadtest>",
+        "Subject": subject,
+        "stripped-html": body,
+        "stripped-text": body,
+        "In-Reply-To": reply_id,
+    }
+
+
+class InboundWebhookGenerator:
+    def __init__(
+        self,
+        signing_key: str,
+        recipients: List[str],
+        url: str = DEFAULT_WEBHOOK_URL,
+        sender: str = "loadtest@example.com",
+        concurrency: int = 16
+    ):
+        self.signing_key = signing_key
+        self.recipients = recipients
+        self.url = url
+        self.sender = sender
+        self.concurrency = concurrency
+
+        self.session = build_pooled_session(concurrency)
+
+    def run(self, count: int, rate: Optional[float] = None) -> InboundLoadResult:
+        """
+        Posts `count` webhooks spread over the recipients, at most `rate` per second if given
+        """
+        latencies: List[float] = []
+        failures = 0
+        lock = threading.Lock()
+
+        def _post(i: int):
+            nonlocal failures
+            payload = build_signed_inbound_payload(
+                self.signing_key,
+                self.sender,
+                self.recipients[i % len(self.recipients)],
+                subject=f"Load test {i}",
+                body=f"<p>Load test message {i}</p>"
+            )
+
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, data=payload, timeout=30)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with lock:
+                latencies.append(elapsed_ms)
+                if not ok:
+                    failures += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for i in range(count):
+                if rate:
+                    # Pace submissions to the target rate
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                executor.submit(_post, i)
+        duration = time.perf_counter() - start
+
+        ordered = sorted(latencies)
+        return InboundLoadResult(
+            sent=count,
+            succeeded=count - failures,
+            failed=failures,
+            duration_seconds=duration,
+            requests_per_second=count / duration if duration > 0 else 0.0,
+            p50_ms=statistics.median(ordered) if ordered else 0.0,
+            p99_ms=ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send signed inbound webhooks to AgentBox")
+    parser.add_argument("--url", default=DEFAULT_WEBHOOK_URL)
+    parser.add_argument("--recipient", action="append", required=True, help="Inbox address, can be repeated")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second, unbounded if not set")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    signing_key = os.getenv("MAILGUN_WEBHOOK_SIGNING_KEY")
+    if not signing_key:
+        raise SystemExit("MAILGUN_WEBHOOK_SIGNING_KEY must be set to sign webhooks")
+
+    generator = InboundWebhookGenerator(
+        signing_key,
+        args.recipient,
+        url=args.url,
+        concurrency=args.concurrency
+    )
+    print(generator.run(args.count, rate=args.rate).model_dump_json(indent=2))